@@ -0,0 +1,285 @@
+import asyncio
+import itertools
+import socket
+
+import sonyprotocol
+
+from camerastate import CameraState
+from liveviewstream import NUM_LIVEVIEW_HEADER_BYTES, NUM_LIVEVIEW_PAYLOAD_HEADER_BYTES, PADDING_SIZE_INDEX, parseLiveViewHeaders
+
+
+class _SSDPProtocol(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.responses = asyncio.Queue()
+
+    def datagram_received(self, data, addr):
+        self.responses.put_nowait(data.decode('utf8', 'replace'))
+
+
+class AsyncSonyCamera(object):
+    """asyncio client for the Sony Camera Remote API.
+
+    Speaks the same protocol as SonyCamera but needs neither Qt nor a thread per activity, so discovery, commands,
+    live view and photo downloads can all be in flight at once on one event loop:
+
+        camera = AsyncSonyCamera()
+        if await camera.connect():
+            async for frame in camera.liveViewFrames():
+                ...
+    """
+
+    SERVICE          = sonyprotocol.SERVICE
+    SSDP_IP          = sonyprotocol.SSDP_IP
+    SSDP_PORT        = sonyprotocol.SSDP_PORT
+    CHUNK_SIZE       = 64 * 1024
+    TIMEOUT          = 8.0
+    CAPTURE_TIMEOUT  = 30.0
+    POLL_INTERVAL    = 0.1
+
+    def __init__(self):
+        self.SSDPInfo = {}
+        self.cameraUrl = None
+        self.liveViewUrl = None
+        self.availableApiList = None
+        self.supportedStillSizes = None
+        self.requestIds = itertools.count(1)
+
+    async def connect(self, service=SERVICE, timeout=1, retries=3):
+        """Find camera and fetch what the GUI needs before starting live view.  Returns True on success."""
+        if not await self.getCameraInfo(service, timeout, retries):
+            return False
+
+        # Independent setup commands, no need to wait for one before sending the other.
+        self.availableApiList, sizes = await asyncio.gather(self.sendCameraCommand("getAvailableApiList", []),
+                                                            self.sendCameraCommand("getSupportedStillSize", []))
+
+        if sizes and sizes[0]:
+            self.supportedStillSizes = sonyprotocol.sortStillSizes(sizes[0])
+
+        else:
+            self.supportedStillSizes = None
+
+        return True
+
+    async def getCameraInfo(self, service=SERVICE, timeout=1, retries=3):
+        """Use Simple Service Discovery Protocol (SSDP) to find camera and the URLs for communicating with it."""
+        loop = asyncio.get_event_loop()
+        message = sonyprotocol.ssdpSearchMessage(service, self.SSDP_IP, self.SSDP_PORT)
+
+        for retry in range(retries):
+            try:
+                transport, protocol = await loop.create_datagram_endpoint(_SSDPProtocol, family=socket.AF_INET)
+
+            except OSError:
+                continue
+
+            try:
+                sock = transport.get_extra_info('socket')
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
+                transport.sendto(message, (self.SSDP_IP, self.SSDP_PORT))
+
+                responseString = await asyncio.wait_for(protocol.responses.get(), timeout)
+
+            except (OSError, asyncio.TimeoutError):
+                responseString = ''
+
+            finally:
+                transport.close()
+
+            SSDPInfo = sonyprotocol.parseSSDPResponse(responseString)
+
+            # Check we got useful info from SSDP response, including URL of camera XML document.
+            if 'location' in SSDPInfo:
+                self.SSDPInfo = SSDPInfo
+
+                if await self.getCameraXmlDoc():
+                    return True
+
+        return False
+
+    async def getCameraXmlDoc(self):
+        """Fetch camera device description and extract camera command URL from it."""
+        try:
+            cameraXmlDataString = await self.download(self.SSDPInfo['location'])
+
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            return False
+
+        if not cameraXmlDataString:
+            return False
+
+        pathString = sonyprotocol.cameraCommandUrl(sonyprotocol.parseCameraXmlDoc(cameraXmlDataString))
+
+        if not pathString or not sonyprotocol.splitUrl(pathString):
+            return False
+
+        self.cameraUrl = pathString
+
+        return True
+
+    async def sendCameraCommand(self, methodStr, paramsList):
+        """Send a JSON-RPC command to camera.  Returns its result, None on error."""
+        HOST, PORT, path = sonyprotocol.splitUrl(self.cameraUrl)
+        requestId = next(self.requestIds)
+
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(HOST, PORT), self.TIMEOUT)
+
+        except (OSError, asyncio.TimeoutError):
+            print("sock error")
+            return None
+
+        try:
+            writer.write(sonyprotocol.cameraCommandRequest(path, HOST, methodStr, paramsList, requestId))
+
+            payloadLength = await self._readHeader(reader)
+            jsonResponseString = await asyncio.wait_for(reader.readexactly(payloadLength), self.TIMEOUT)
+
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            print("sock error")
+            return None
+
+        finally:
+            writer.close()
+
+        # No Content-Length, nothing to parse.
+        if not jsonResponseString:
+            return None
+
+        try:
+            return sonyprotocol.parseCommandResponse(methodStr, paramsList, jsonResponseString, requestId)
+
+        except ValueError:
+            print("ERROR: Invalid response to %s" % methodStr)
+            return None
+
+    async def liveViewFrames(self):
+        """Start live view and yield JPEG frames until the stream breaks or the iterator is closed."""
+        responseJsonValue = await self.sendCameraCommand("startLiveview", [])
+
+        if not responseJsonValue:
+            return
+
+        self.liveViewUrl = responseJsonValue[0]
+
+        try:
+            reader, writer = await self._openGet(self.liveViewUrl)
+
+        except (OSError, asyncio.TimeoutError):
+            return
+
+        numHeaderBytes = NUM_LIVEVIEW_HEADER_BYTES + NUM_LIVEVIEW_PAYLOAD_HEADER_BYTES
+
+        try:
+            await self._readHeader(reader)
+
+            while True:
+                headers = await asyncio.wait_for(reader.readexactly(numHeaderBytes), self.TIMEOUT)
+
+                # Returns 0 if headers are corrupted.
+                totalNumBytesToGet = parseLiveViewHeaders(headers[:NUM_LIVEVIEW_HEADER_BYTES], headers[NUM_LIVEVIEW_HEADER_BYTES:])
+
+                if not totalNumBytesToGet:
+                    break
+
+                frame = await asyncio.wait_for(reader.readexactly(totalNumBytesToGet), self.TIMEOUT)
+                numPaddingBytes = headers[NUM_LIVEVIEW_HEADER_BYTES + PADDING_SIZE_INDEX]
+
+                if numPaddingBytes:
+                    await asyncio.wait_for(reader.readexactly(numPaddingBytes), self.TIMEOUT)
+
+                yield frame
+
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+
+        finally:
+            writer.close()
+
+    async def takePhoto(self, progress=None):
+        """Take a still photo and download its postview image.  Returns the JPEG data, None on failure."""
+        cameraStatus = await self.getCameraStatus()
+
+        if cameraStatus != 'IDLE':
+            print("ERROR: Operation [TakePicture] aborted, camera not in IDLE state")
+            return None
+
+        snapShot = await self.sendCameraCommand("actTakePicture", [])
+
+        if not snapShot:
+            return None
+
+        # Wait for camera to complete taking photo.
+        deadline = asyncio.get_event_loop().time() + self.CAPTURE_TIMEOUT
+
+        while True:
+            if await self.getCameraStatus() == 'IDLE':
+                break
+
+            if asyncio.get_event_loop().time() > deadline:
+                print("ERROR: Camera did not return to IDLE state after taking picture")
+                return None
+
+            await asyncio.sleep(self.POLL_INTERVAL)
+
+        try:
+            return await self.download(snapShot[0][0], progress)
+
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            return None
+
+    async def getCameraStatus(self):
+        """Current camera status, e.g. 'IDLE', None if unknown."""
+        eventResult = await self.sendCameraCommand("getEvent", [False])
+
+        if not eventResult:
+            return None
+
+        # Entries are found by type, their position differs between firmware versions and modes.
+        state = CameraState()
+        state.update(eventResult)
+
+        return state.cameraStatus
+
+    async def download(self, url, progress=None):
+        """GET url from camera.  progress, if given, is called with bytes received so far and total size."""
+        reader, writer = await self._openGet(url)
+
+        try:
+            payloadLength = await self._readHeader(reader)
+            data = bytearray()
+
+            while len(data) < payloadLength:
+                chunk = await asyncio.wait_for(reader.read(min(self.CHUNK_SIZE, payloadLength - len(data))), self.TIMEOUT)
+
+                if not chunk:
+                    raise asyncio.IncompleteReadError(bytes(data), payloadLength)
+
+                data += chunk
+
+                if progress:
+                    progress(len(data), payloadLength)
+
+        finally:
+            writer.close()
+
+        return bytes(data)
+
+    async def _openGet(self, url):
+        location = sonyprotocol.splitUrl(url)
+
+        if not location:
+            raise OSError("Unsupported camera URL: %s" % url)
+
+        HOST, PORT, path = location
+
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(HOST, PORT), self.TIMEOUT)
+        writer.write(sonyprotocol.httpGetRequest(path, HOST))
+
+        return reader, writer
+
+    async def _readHeader(self, reader):
+        """Read an HTTP response header, returns its content length."""
+        header = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.TIMEOUT)
+
+        return sonyprotocol.getMessageLengthField(header)
@@ -0,0 +1,322 @@
+"""Benchmarks of the camera protocol hot paths against the simulated camera.
+
+Measures live view frames/s and client CPU time per frame, command round trip latency percentiles, postview
+download throughput, live view header parsing and JPEG decode/paint time, for a sweep of frame sizes and link
+conditions.  Results are written as JSON, and --compare prints how they moved against an earlier run:
+
+    python ./benchmark.py --output before.json
+    python ./benchmark.py --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+
+from cameraclient import CameraClient
+from liveviewstream import NUM_LIVEVIEW_HEADER_BYTES, parseLiveViewHeaders
+from qx10sim import liveViewFrame, paddedJpeg
+
+
+# Link conditions: simulator latency, jitter, frame loss and command loss.
+PROFILES = {
+               'ideal':  {'latency': 0.0,   'jitter': 0.0,   'loss': 0.0,  'commandLoss': 0.0},
+               'wifi':   {'latency': 0.005, 'jitter': 0.005, 'loss': 0.0,  'commandLoss': 0.0},
+               'lossy':  {'latency': 0.02,  'jitter': 0.02,  'loss': 0.05, 'commandLoss': 0.02},
+           }
+
+FRAME_SIZES = [10000, 30000, 100000]
+
+
+def percentile(sortedSamples, fraction):
+    if not sortedSamples:
+        return None
+
+    return sortedSamples[min(len(sortedSamples) - 1, int(len(sortedSamples) * fraction))]
+
+
+def startSimulator(profile, frameSize, postviewSize, fps, seed):
+    """Run the simulator in its own process, so its CPU time is not counted as the client's."""
+    conditions = PROFILES[profile]
+    command = [sys.executable, '-u', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'qx10sim.py'),
+               '--port', '0', '--ssdp-port', '0', '--fps', str(fps), '--frame-size', str(frameSize),
+               '--postview-size', str(postviewSize), '--capture-time', '0',
+               '--latency', str(conditions['latency']), '--jitter', str(conditions['jitter']),
+               '--loss', str(conditions['loss']), '--command-loss', str(conditions['commandLoss']), '--seed', str(seed)]
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, universal_newlines=True)
+
+    # Wait for "Simulated QX10 at http://127.0.0.1:<port>, SSDP on port <port>".
+    for line in process.stdout:
+        if line.startswith('Simulated QX10'):
+            return process, int(line.split()[-1])
+
+    raise RuntimeError("Simulator did not start")
+
+
+def connectClient(ssdpPort, frameCallback=None):
+    client = CameraClient(frameCallback=frameCallback)
+    client.SSDP_IP = '127.0.0.1'
+    client.SSDP_PORT = ssdpPort
+
+    if not client.connect(startLiveView=False):
+        raise RuntimeError("Unable to connect to simulator")
+
+    return client
+
+
+def benchLiveView(client, duration):
+    frames = []
+    client.frameCallback = frames.append
+
+    client.startLiveView()
+
+    # Let the stream settle before measuring.
+    time.sleep(0.5)
+
+    numFrames = len(frames)
+    cpuStart = time.process_time()
+    start = time.monotonic()
+
+    time.sleep(duration)
+
+    cpu = time.process_time() - cpuStart
+    elapsed = time.monotonic() - start
+    numFrames = len(frames) - numFrames
+    stats = client.liveViewStats.snapshot()
+
+    client.stopLiveView()
+    client.frameCallback = None
+
+    return {
+               'framesPerSecond': numFrames / elapsed,
+               'cpuPerFrame': cpu / numFrames if numFrames else None,
+               'cpuShare': cpu / elapsed,
+               'bytesPerSecond': stats['bytesPerSecond'],
+               'framesDropped': stats['framesDropped'],
+               'jitter': stats['jitter'],
+           }
+
+
+def benchCommands(client, count):
+    samples = []
+    failures = 0
+
+    for i in range(count):
+        start = time.perf_counter()
+
+        if client.call('getShootMode', []) is None:
+            failures += 1
+            continue
+
+        samples.append(time.perf_counter() - start)
+
+    samples.sort()
+
+    return {
+               'count': count,
+               'failures': failures,
+               'mean': sum(samples) / len(samples) if samples else None,
+               'p50': percentile(samples, 0.50),
+               'p95': percentile(samples, 0.95),
+               'p99': percentile(samples, 0.99),
+           }
+
+
+def benchDownload(client, count):
+    snapShot = client.call('actTakePicture', [])
+
+    if not snapShot:
+        return None
+
+    url = snapShot[0][0]
+    numBytes = 0
+    failures = 0
+    start = time.perf_counter()
+
+    for i in range(count):
+        image = client.downloadPhoto(url, client.photoBuffer)
+
+        if image is None:
+            failures += 1
+
+        else:
+            numBytes += len(image)
+
+    elapsed = time.perf_counter() - start
+
+    return {
+               'count': count,
+               'failures': failures,
+               'megabytesPerSecond': numBytes / elapsed / 1e6,
+           }
+
+
+def benchHeaderParse(iterations=100000):
+    frame = memoryview(liveViewFrame(1, 1000, paddedJpeg(1000)))
+    common = frame[:NUM_LIVEVIEW_HEADER_BYTES]
+    payload = frame[NUM_LIVEVIEW_HEADER_BYTES:NUM_LIVEVIEW_HEADER_BYTES + 128]
+
+    seconds = min(timeit.repeat(lambda: parseLiveViewHeaders(common, payload), number=iterations, repeat=3))
+
+    return {'secondsPerCall': seconds / iterations}
+
+
+def benchDecode(jpeg, iterations=200):
+    """JPEG decode, and with Qt also pixmap conversion, per frame.  Uses Qt if installed, else Pillow, else None."""
+    try:
+        from PyQt4.QtGui import QApplication, QImage, QPixmap
+
+    except ImportError:
+        QImage = None
+
+    if QImage is not None:
+        app = QApplication.instance() or QApplication(sys.argv[:1])
+
+        decode = min(timeit.repeat(lambda: QImage.fromData(jpeg, 'JPG'), number=iterations, repeat=3)) / iterations
+
+        image = QImage.fromData(jpeg, 'JPG')
+        paint = min(timeit.repeat(lambda: QPixmap.fromImage(image), number=iterations, repeat=3)) / iterations
+
+        return {'decoder': 'Qt', 'decode': decode, 'paint': paint}
+
+    try:
+        import io
+
+        from PIL import Image
+
+    except ImportError:
+        return None
+
+    decode = min(timeit.repeat(lambda: Image.open(io.BytesIO(jpeg)).load(), number=iterations, repeat=3)) / iterations
+
+    return {'decoder': 'Pillow', 'decode': decode, 'paint': None}
+
+
+def run(args):
+    results = {
+                  'time': time.time(),
+                  'python': platform.python_version(),
+                  'platform': platform.platform(),
+                  'parameters': vars(args),
+                  'headerParse': benchHeaderParse(),
+                  'decode': dict((str(frameSize), benchDecode(paddedJpeg(frameSize))) for frameSize in args.frame_sizes),
+                  'runs': [],
+              }
+
+    if args.sample:
+        # Simulated frames are a small image padded to size, real frames show the actual decode cost.
+        from liveviewrecorder import LiveViewRecording
+
+        recording = LiveViewRecording(args.sample)
+        results['decode']['sample'] = benchDecode(recording[len(recording) // 2].data)
+        recording.close()
+
+    for profile in args.profiles:
+        for frameSize in args.frame_sizes:
+            process, ssdpPort = startSimulator(profile, frameSize, args.postview_size, args.fps, args.seed)
+
+            try:
+                client = connectClient(ssdpPort)
+
+                try:
+                    print("%s, %d byte frames" % (profile, frameSize), file=sys.stderr)
+
+                    results['runs'].append({
+                                               'profile': profile,
+                                               'frameSize': frameSize,
+                                               'liveView': benchLiveView(client, args.duration),
+                                               'commands': benchCommands(client, args.commands),
+                                               'download': benchDownload(client, args.downloads),
+                                           })
+
+                finally:
+                    client.close()
+
+            finally:
+                process.terminate()
+                process.wait()
+
+    return results
+
+
+def flatten(results):
+    """Numeric metrics of a result document as {name: value}."""
+    metrics = {'headerParse.secondsPerCall': results['headerParse']['secondsPerCall']}
+
+    for frameSize, decode in results['decode'].items():
+        for key in ('decode', 'paint'):
+            if decode and decode[key] is not None:
+                metrics['decode.%s.%s' % (frameSize, key)] = decode[key]
+
+    for run in results['runs']:
+        prefix = '%s.%d' % (run['profile'], run['frameSize'])
+
+        for section in ('liveView', 'commands', 'download'):
+            for key, value in (run[section] or {}).items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metrics['%s.%s.%s' % (prefix, section, key)] = value
+
+    return metrics
+
+
+def compare(results, previous):
+    current = flatten(results)
+    before = flatten(previous)
+
+    for name in sorted(current):
+        if name in before and before[name]:
+            print("%-50s %14.6g %14.6g %+8.1f%%" % (name, before[name], current[name], 100.0 * (current[name] / before[name] - 1.0)))
+
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the camera protocol hot paths against the simulated camera.")
+    parser.add_argument('--profiles', nargs='+', choices=sorted(PROFILES), default=sorted(PROFILES), help="link conditions")
+    parser.add_argument('--frame-sizes', nargs='+', type=int, default=FRAME_SIZES, help="live view JPEG sizes in bytes")
+    parser.add_argument('--fps', type=float, default=30.0, help="simulated live view frame rate (default: %(default)s)")
+    parser.add_argument('--duration', type=float, default=3.0, help="seconds of live view per run (default: %(default)s)")
+    parser.add_argument('--commands', type=int, default=200, help="commands per run (default: %(default)s)")
+    parser.add_argument('--downloads', type=int, default=5, help="postview downloads per run (default: %(default)s)")
+    parser.add_argument('--postview-size', type=int, default=2 * 1024 * 1024, help="postview bytes (default: %(default)s)")
+    parser.add_argument('--sample', help="live view recording to take a real frame from for the decode benchmark")
+    parser.add_argument('--seed', type=int, default=1, help="simulator random seed (default: %(default)s)")
+    parser.add_argument('--output', help="write results to this JSON file, default is standard output")
+    parser.add_argument('--compare', help="earlier results file to compare with")
+
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parseArguments(argv)
+
+    # The client prints progress, keep it away from results on standard output.
+    stdout, sys.stdout = sys.stdout, sys.stderr
+
+    try:
+        results = run(args)
+
+    finally:
+        sys.stdout = stdout
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+    return 0
+
+
+#Run this as a script if running stand alone
+if __name__=="__main__":
+    sys.exit(main(sys.argv[1:]))
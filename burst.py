@@ -0,0 +1,89 @@
+import threading
+import time
+
+from queue import Queue
+
+
+class BurstShooter(object):
+    """Continuous shooting with postview downloads running as a separate stage.
+
+    The capture loop fires actTakePicture at the requested cadence and only queues the postview URL; a downloader
+    thread fetches the JPEGs, so the camera is already taking shot k+1 while shot k is still transferring."""
+
+    CAPTURE_TIMEOUT = 30.0
+
+    def __init__(self, client, download, photoCallback):
+        """client is the CameraClient to shoot with.  download(url) returns the postview JPEG or None,
+        photoCallback(image) is called in the downloader thread."""
+        self.client = client
+        self.download = download
+        self.photoCallback = photoCallback
+
+    def run(self, count, interval=0.0):
+        """Take count shots, at most one every interval seconds.  Blocks until all downloads are done.
+
+        A shot the camera fails or rejects is counted as failed and the burst goes on.  Returns dict with shot counts,
+        elapsed time and the sustained shots per second achieved."""
+        downloadQueue = Queue()
+        downloaded = []
+
+        downloader = threading.Thread(target=self._downloadLoop, args=(downloadQueue, downloaded), name='BurstDownloader')
+        downloader.daemon = True
+        downloader.start()
+
+        numShots = 0
+        numFailed = 0
+        start = time.monotonic()
+
+        for shot in range(count):
+            # Keep cadence relative to start of burst so slow shots do not push every later shot back.
+            delay = start + shot * interval - time.monotonic()
+
+            if delay > 0:
+                time.sleep(delay)
+
+            if not self.client.waitForIdle(BurstShooter.CAPTURE_TIMEOUT):
+                print("ERROR: Burst aborted, camera not in IDLE state, current state: %s" % self.client.cameraState.cameraStatus)
+                break
+
+            snapShot = self.client.call("actTakePicture", [])
+
+            if not snapShot:
+                print("ERROR: Burst shot %d of %d failed" % (shot + 1, count))
+                numFailed += 1
+                continue
+
+            numShots += 1
+            downloadQueue.put(snapShot[0][0])
+
+        captureTime = time.monotonic() - start
+
+        # Tell downloader there is nothing more to come and wait for it to drain the queue.
+        downloadQueue.put(None)
+        downloader.join()
+
+        elapsed = time.monotonic() - start
+
+        return {
+                   'requested': count,
+                   'shots': numShots,
+                   'failed': numFailed,
+                   'downloaded': len(downloaded),
+                   'captureTime': captureTime,
+                   'elapsed': elapsed,
+                   'shotsPerSecond': numShots / captureTime if captureTime else 0.0,
+                   'sustainedShotsPerSecond': len(downloaded) / elapsed if elapsed else 0.0,
+               }
+
+    def _downloadLoop(self, downloadQueue, downloaded):
+        while True:
+            url = downloadQueue.get()
+
+            if url is None:
+                break
+
+            image = self.download(url)
+
+            if image is not None:
+                downloaded.append(url)
+                self.photoCallback(image)
@@ -0,0 +1,908 @@
+import os
+import socket
+import tempfile
+import threading
+import urllib.parse
+import time
+
+from concurrent.futures import Future
+
+import sonyprotocol
+
+from recvbuffer import RecvBuffer
+from connectionpool import ConnectionPool
+from rpcclient import RpcClient
+from liveviewstream import LiveViewStream, LiveViewFrame
+from streamstats import LiveViewStats
+from camerastate import CameraState, CameraStateWatcher
+from burst import BurstShooter
+from liveviewrecovery import LiveViewRecovery
+from discovery import Discovery
+
+
+class CameraClient(object):
+    """Sony Camera Remote API client without any GUI dependency: discovery, commands, live view and downloads.
+
+    Methods block and run in the caller's thread; live view and the camera state watcher run in their own threads
+    and report through the callbacks, all optional:
+        frameCallback(frame)              every live view frame as a LiveViewFrame, in live view thread,
+        liveViewErrorCallback()           live view stream failed and was not recovered, see recoverLiveView,
+        stateChangedCallback(changed)     dict of changed camera state fields, in state watcher thread,
+        statsCallback(snapshot)           live view stats every STATS_INTERVAL, in live view thread.
+
+    SonyCamera wraps this for the Qt GUI, cli.py uses it directly."""
+
+    SERVICE                            = sonyprotocol.SERVICE
+    SSDP_IP                            = sonyprotocol.SSDP_IP
+    SSDP_PORT                          = sonyprotocol.SSDP_PORT
+    CHUNK_SIZE                         = 4096
+    CAPTURE_TIMEOUT                    = 30.0
+    DOWNLOAD_CHUNK_SIZE                = 256 * 1024
+    STATS_INTERVAL                     = 1.0
+    CACHED_CAMERA_TIMEOUT              = 0.5
+    LIVEVIEW_CONNECT_TIMEOUT           = 2.0
+    LIVEVIEW_READ_TIMEOUT              = 2.0
+    RECOVERY_GRACE                     = 5.0
+
+    # Methods sent whatever the available API list says, they are needed to learn it.
+    ALWAYS_AVAILABLE                   = ('getEvent', 'getAvailableApiList', 'getApplicationInfo', 'getVersions', 'getMethodTypes')
+
+    def __init__(self, frameCallback=None, liveViewErrorCallback=None, stateChangedCallback=None, statsCallback=None):
+        self.frameCallback = frameCallback
+        self.liveViewErrorCallback = liveViewErrorCallback
+        self.stateChangedCallback = stateChangedCallback
+        self.statsCallback = statsCallback
+
+        self.SSDPInfo = {}
+        self.serviceUrls = None
+        self.cameraUrl = None
+        self.liveViewUrl = None
+        self.liveViewActive = False
+        self.availableApiList = None
+        self.supportedStillSizes = None
+        self.firmware = None
+
+        # Keep-alive connections and JSON-RPC layer for camera commands, created once the camera URL is known.
+        self.commandPool = None
+        self.rpc = None
+
+        # Same for the state watcher's long-polling getEvent calls, kept apart so they are not counted in
+        # commandStats().
+        self.eventPool = None
+        self.eventRpc = None
+
+        # Camera state cache, kept current by a long-polling getEvent watcher thread while connected.
+        self.cameraState = CameraState()
+        self.stateWatcher = None
+
+        # Live view runs in its own thread, see startLiveView.  If it fails and recoverLiveView is set, a
+        # LiveViewRecovery thread brings it back without bothering liveViewErrorCallback, unless that takes too long.
+        self.liveViewStream = None
+        self.liveViewLock = threading.Lock()
+        self.recoverLiveView = True
+        self.liveViewRecovery = None
+        self.lastRecovery = None
+
+        # Stream health counters, passed to statsCallback every STATS_INTERVAL and, if statsLogFile is set to an
+        # open file, appended to it as JSON lines.
+        self.liveViewStats = LiveViewStats()
+        self.statsLogFile = None
+
+        # Receive buffer reused for every photo download.
+        self.photoBuffer = RecvBuffer()
+
+        # If set to a PhotoStorage, photos are streamed straight into its directory and takePhoto() returns the
+        # path, otherwise it returns the image data.
+        self.photoStorage = None
+
+        # If set to a LiveViewRecorder, every live view frame is also handed to it for recording.
+        self.liveViewRecorder = None
+
+        # If set to a FrameRing, the last live view frames are kept in it, to be saved after the fact.
+        self.frameRing = None
+
+        # If set to a LiveViewSizeController, live view switches between the sizes of startLiveviewWithSize as the
+        # link allows, on cameras that have it.
+        self.liveViewSizeController = None
+
+        # If set to a DiscoveryCache, cameras found are remembered and tried first on the next connect.
+        self.discoveryCache = None
+
+        # If set to a CapabilityCache, a known camera's capabilities are used at once on connect and refreshed in
+        # the background.
+        self.capabilityCache = None
+
+    def connect(self, service=SERVICE, startLiveView=True, SSDPInfo=None):
+        """Find camera, fetch its capabilities and state and optionally start live view.  Returns True on success.
+
+        SSDPInfo, a discovery response, picks the camera to connect to instead of discovering one."""
+        self.close()
+
+        self.cameraState = CameraState()
+        self.liveViewStats.reset()
+
+        self.SSDPInfo = {}
+        self.serviceUrls = None
+        self.cameraUrl = None
+        self.availableApiList = None
+        self.supportedStillSizes = None
+        self.firmware = None
+
+        if SSDPInfo:
+            self.SSDPInfo = SSDPInfo
+
+            if not self._getCameraXmlDoc():
+                return False
+
+        # Use Simple Service Discovery Protocol (SSDP) to find camera, ping it to get info and URLs for communicating with it.
+        elif not self.getCameraInfo(service):
+            return False
+
+        cached = self.capabilityCache.lookup(self.SSDPInfo) if self.capabilityCache else None
+
+        # Setup commands do not depend on each other, send them all before waiting for any.  The available API
+        # list comes with getEvent.
+        applicationInfo = self.rpc.callAsync("getApplicationInfo", [])
+        stillSizes = self.rpc.callAsync("getSupportedStillSize", [])
+        liveView = self.rpc.callAsync("startLiveview", []) if startLiveView else None
+        cameraEvent = self.rpc.callAsync("getEvent", [False])
+
+        if cached:
+            # Known camera, use what it supported last time and check that in the background.
+            self.supportedStillSizes = cached.get('supportedStillSizes')
+            threading.Thread(target=self._refreshCapabilities, args=(applicationInfo, stillSizes),
+                             name='CapabilityRefresh', daemon=True).start()
+
+        else:
+            self._refreshCapabilities(applicationInfo, stillSizes)
+
+        # Fill state cache, then keep it current in the background.
+        if cameraEvent.result():
+            self.cameraState.update(cameraEvent.result())
+            self.availableApiList = self.cameraState.availableApiList
+
+        self.stateWatcher = CameraStateWatcher(self.eventRpc, self.cameraState, self._handleStateChanged)
+        self.stateWatcher.start()
+
+        if liveView:
+            # Tell camera to start live view, this also starts the live view thread.
+            self.startLiveView(liveView)
+
+        return True
+
+    def close(self):
+        """Stop live view and state watcher threads and close command connections."""
+        self.stopLiveView()
+
+        if self.stateWatcher:
+            self.stateWatcher.stop()
+            self.stateWatcher = None
+
+        self._closeCommandChannel()
+
+    def _closeCommandChannel(self):
+        if self.rpc:
+            self.rpc.close()
+            self.rpc = None
+
+        if self.commandPool:
+            self.commandPool.close()
+            self.commandPool = None
+
+        if self.eventRpc:
+            self.eventRpc.close()
+            self.eventRpc = None
+
+        if self.eventPool:
+            self.eventPool.close()
+            self.eventPool = None
+
+    def getCameraInfo(self, service=SERVICE, timeout=1, retries=3):
+        """Find camera and the URLs for communicating with it.  Returns True on success.
+
+        A camera in discoveryCache is tried first, while Simple Service Discovery Protocol (SSDP) discovery runs in
+        parallel in case it is gone.  Discovery listens for timeout * retries seconds and refreshes the cache with
+        every camera that answered."""
+        cache = self.discoveryCache
+        serviceUrls = {}
+
+        def discoveryDone(responders):
+            if cache and responders:
+                cache.storeAll(responders, serviceUrls)
+
+        discovery = Discovery(service, self.SSDP_IP, self.SSDP_PORT, timeout * retries, retries, discoveryDone)
+        discovery.start()
+
+        if cache:
+            for entry in cache.lookup(service):
+                if 'serviceUrls' not in entry or not self._getCameraUrls(entry['serviceUrls']):
+                    continue
+
+                # Known camera still there?  A cheap command tells quickly.
+                if self.call("getVersions", [], CameraClient.CACHED_CAMERA_TIMEOUT) is not None:
+                    self.SSDPInfo = entry
+                    self.serviceUrls = entry['serviceUrls']
+                    return True
+
+                self._closeCommandChannel()
+
+        for SSDPInfo in iter(discovery.responses.get, None):
+            self.SSDPInfo = SSDPInfo
+
+            # Get URL of camera XML document from SSDP response, then the command URLs from the document.
+            if self._getCameraXmlDoc():
+                serviceUrls[SSDPInfo['location']] = self.serviceUrls
+
+                if cache:
+                    cache.store(SSDPInfo, self.serviceUrls)
+
+                return True
+
+        return False
+
+    def _getCameraXmlDoc(self):
+        retVal = False
+
+        # Use contents of SSDP response to get IP address and port number of camera XML document.
+        location = sonyprotocol.splitUrl(self.SSDPInfo['location'])
+
+        if not location:
+            return False
+
+        HOST, PORT, path = location
+
+        sock = self._createSockAndSend((socket.AF_INET, socket.SOCK_STREAM), HOST, PORT, sonyprotocol.httpGetRequest(path, HOST))
+
+        if sock:
+            numBytes = sonyprotocol.getMessageLengthField(self._recvHttpHeader(sock))
+
+            cameraXmlDataString = self._recvAllData(sock, numBytes)
+            sock.close()
+
+            if cameraXmlDataString:
+                # Parse XML string returned by camera to get URL for camera API commands.
+                self.serviceUrls = sonyprotocol.parseCameraXmlDoc(cameraXmlDataString)
+                retVal = self._getCameraUrls(self.serviceUrls)
+
+        return retVal
+
+    def _getCameraUrls(self, serviceUrls):
+        retVal = False
+
+        # Extract camera URL. This is where the camera API commands are sent to.
+        pathString = sonyprotocol.cameraCommandUrl(serviceUrls)
+
+        if pathString:
+            self.cameraUrl = urllib.parse.urlparse(pathString)
+
+            # Get camera command API URL and port number.
+            temp = self.cameraUrl.netloc.split(':')
+
+            if len(temp) == 2:
+                self.cameraCommandHost = temp[0]
+                self.cameraCommandPort = int(temp[1])
+                self.commandPool = ConnectionPool(self.cameraCommandHost, self.cameraCommandPort)
+                self.rpc = RpcClient(self.commandPool, self.cameraUrl.path)
+                self.eventPool = ConnectionPool(self.cameraCommandHost, self.cameraCommandPort)
+                self.eventRpc = RpcClient(self.eventPool, self.cameraUrl.path)
+                retVal = True
+
+        return retVal
+
+    def _getSupportedStillSizes(self, response):
+        """Still sizes of a getSupportedStillSize result, largest first, None if there are none."""
+        sizes = response[0] if response else None
+
+        if not sizes:
+            return None
+
+        return sonyprotocol.sortStillSizes(sizes)
+
+    def _refreshCapabilities(self, applicationInfo, stillSizes):
+        """Take in Futures of getApplicationInfo and getSupportedStillSize results and update the cache."""
+        info = applicationInfo.result()
+
+        # getApplicationInfo is [name, version], the version identifies the firmware.
+        self.firmware = info[1] if info and len(info) > 1 else None
+
+        self._storeStillSizes(stillSizes.result())
+
+    def _storeStillSizes(self, response):
+        sizes = self._getSupportedStillSizes(response)
+
+        if sizes is None:
+            # Keep a cached list rather than none at all.
+            return
+
+        self.supportedStillSizes = sizes
+
+        if self.capabilityCache:
+            self.capabilityCache.store(self.SSDPInfo, self.firmware, supportedStillSizes=sizes)
+
+    def _handleStateChanged(self, changed):
+        # The camera reports its available API list with every change of mode or status, keep the local check of
+        # commands in step.
+        if 'availableApiList' in changed:
+            self.availableApiList = changed['availableApiList']
+
+        # Supported still sizes can differ between modes, fetch them again.
+        if 'shootMode' in changed and self.rpc and self.isAvailable("getSupportedStillSize"):
+            self.rpc.callAsync("getSupportedStillSize", [], self._storeStillSizes)
+
+        if self.stateChangedCallback:
+            self.stateChangedCallback(changed)
+
+    def startLiveView(self, pendingResponse=None):
+        """Start live view.  pendingResponse is an already sent startLiveview command's Future.  Returns True on success."""
+        self.stopLiveView()
+
+        sizeController = self.liveViewSizeController
+
+        if pendingResponse:
+            responseJsonValue = pendingResponse.result()
+
+            if sizeController:
+                sizeController.reset()
+
+        elif sizeController and self._hasLiveViewSizes():
+            responseJsonValue = self.call("startLiveviewWithSize", [sizeController.size])
+
+        else:
+            responseJsonValue = self.call("startLiveview", [])
+
+            if sizeController:
+                sizeController.reset()
+
+        if responseJsonValue:
+            self.liveViewUrl = responseJsonValue[0]
+            self._openLiveViewStream()
+
+        return self.liveViewActive
+
+    def stopLiveView(self):
+        """Stop the live view thread, and its recovery if under way.  The camera keeps live view running for the next
+        startLiveView()."""
+        with self.liveViewLock:
+            self.liveViewActive = False
+            stream, self.liveViewStream = self.liveViewStream, None
+            recovery, self.liveViewRecovery = self.liveViewRecovery, None
+
+        if recovery:
+            recovery.stop()
+
+        if stream:
+            stream.stop()
+
+    def _openLiveViewStream(self, recovery=None):
+        """Connect to liveViewUrl and hand the stream to a new live view thread.  Returns True on success.
+
+        recovery is the LiveViewRecovery asking, the stream is dropped if it was stopped meanwhile."""
+        # Get IP address and port number of live view server on camera.
+        location = sonyprotocol.splitUrl(self.liveViewUrl) if self.liveViewUrl else None
+
+        if not location:
+            return False
+
+        HOST, PORT, imagePath = location
+
+        sock = self._createSockAndSend((socket.AF_INET, socket.SOCK_STREAM), HOST, PORT, sonyprotocol.httpGetRequest(imagePath, HOST),
+                                       CameraClient.LIVEVIEW_CONNECT_TIMEOUT)
+
+        if not sock:
+            return False
+
+        # Receive live view header.  A camera that stopped live view meanwhile answers with an error instead.
+        header = self._recvHttpHeader(sock)
+
+        if not header or header.split(None, 2)[1:2] != [b'200']:
+            sock.close()
+            return False
+
+        # Frames come many times a second, a stream silent for longer has dropped out.
+        sock.settimeout(CameraClient.LIVEVIEW_READ_TIMEOUT)
+
+        # Keep live view socket open and hand it over to the live view thread.
+        stream = LiveViewStream(sock, self._handleLiveViewFrame, self._handleLiveViewError, self.liveViewStats)
+
+        with self.liveViewLock:
+            if recovery and recovery is not self.liveViewRecovery:
+                sock.close()
+                return False
+
+            # A new stream counts its sequence numbers and timestamps from scratch.
+            self.liveViewStats.streamStarted()
+
+            self.liveViewStream = stream
+            self.liveViewActive = True
+            stream.start()
+
+        return True
+
+    def _reopenLiveView(self, recovery):
+        """Recovery attempt without any camera command, the live view URL usually stays valid."""
+        return self._openLiveViewStream(recovery)
+
+    def _restartLiveView(self, recovery):
+        """Recovery attempt telling the camera to start live view again first."""
+        responseJsonValue = self.call("startLiveview", [], CameraClient.LIVEVIEW_CONNECT_TIMEOUT)
+
+        if not responseJsonValue or recovery.stopped():
+            return False
+
+        if self.liveViewSizeController:
+            # Back at the camera's default size, the link has just been down anyway.
+            self.liveViewSizeController.reset()
+
+        self.liveViewUrl = responseJsonValue[0]
+
+        return self._openLiveViewStream(recovery)
+
+    def _handleLiveViewRecovered(self, recovery, seconds, attempts):
+        """Called in recovery thread once live view runs again."""
+        with self.liveViewLock:
+            if recovery is self.liveViewRecovery:
+                self.liveViewRecovery = None
+
+        self.lastRecovery = time.monotonic()
+        self.liveViewStats.recovered(seconds)
+
+    def _handleLiveViewLost(self, recovery):
+        """Called in recovery thread when live view could not be recovered."""
+        with self.liveViewLock:
+            if recovery is not self.liveViewRecovery:
+                return
+
+            self.liveViewRecovery = None
+
+        if self.liveViewErrorCallback:
+            self.liveViewErrorCallback()
+
+    def _handleLiveViewFrame(self, frame, sequence, timestamp):
+        """Called in live view thread for every frame."""
+        # The frame is a view into the stream's reused buffer, copy it once for everyone downstream.
+        liveViewFrame = LiveViewFrame(bytes(frame), sequence, timestamp, time.monotonic())
+
+        if self.frameCallback:
+            self.frameCallback(liveViewFrame)
+
+        recorder = self.liveViewRecorder
+
+        if recorder:
+            # Only queues the frame, the recorder writes in its own thread.
+            recorder.submit(liveViewFrame)
+
+        frameRing = self.frameRing
+
+        if frameRing is not None:
+            frameRing.append(liveViewFrame)
+
+        if self.liveViewStats.exportDue(CameraClient.STATS_INTERVAL):
+            snapshot = self.liveViewStats.snapshot()
+
+            if self.statsCallback:
+                self.statsCallback(snapshot)
+
+            if self.statsLogFile:
+                self.liveViewStats.export(self.statsLogFile)
+
+            sizeController = self.liveViewSizeController
+
+            if sizeController and self._hasLiveViewSizes():
+                size = sizeController.update(snapshot)
+
+                if size:
+                    self.setLiveViewSize(size)
+
+    def setLiveViewSize(self, size):
+        """Switch running live view to size, 'L' or 'M', in the background.  Returns a Future of the command result."""
+        print("Live view size %s" % size)
+
+        return self.callAsync("startLiveviewWithSize", [size], lambda responseJsonValue: self._switchLiveViewStream(size, responseJsonValue))
+
+    def _hasLiveViewSizes(self):
+        """True if the camera says it has startLiveviewWithSize."""
+        availableApiList = self.availableApiList
+
+        return bool(availableApiList) and "startLiveviewWithSize" in availableApiList
+
+    def _switchLiveViewStream(self, size, responseJsonValue):
+        """Called with the startLiveviewWithSize result, moves live view over to the stream it started.  The size
+        controller learns the new size only once that stream runs."""
+        switched = self._moveLiveViewStream(responseJsonValue)
+
+        sizeController = self.liveViewSizeController
+
+        if sizeController:
+            sizeController.switchDone(size, switched)
+
+    def _moveLiveViewStream(self, responseJsonValue):
+        """Returns True if live view runs from the stream of the startLiveviewWithSize result."""
+        if not responseJsonValue:
+            return False
+
+        with self.liveViewLock:
+            self.liveViewUrl = responseJsonValue[0]
+            stream, self.liveViewStream = self.liveViewStream, None
+
+        if stream is None:
+            # Stopped or failed meanwhile, a recovery picks up the new URL by itself.
+            return False
+
+        stream.stop()
+
+        if self._openLiveViewStream():
+            return True
+
+        with self.liveViewLock:
+            if not self.liveViewActive or self.liveViewStream is not None:
+                return False
+
+            self.liveViewActive = False
+
+            if self.recoverLiveView:
+                self._startRecovery()
+                return False
+
+        if self.liveViewErrorCallback:
+            self.liveViewErrorCallback()
+
+        return False
+
+    def _startRecovery(self):
+        """Start bringing live view back in the background.  Call with liveViewLock held."""
+        # Failing again soon after reopening the old URL means the camera's live view server is gone, go straight to
+        # restarting it.
+        recentlyRecovered = self.lastRecovery and time.monotonic() - self.lastRecovery < CameraClient.RECOVERY_GRACE
+
+        self.liveViewRecovery = LiveViewRecovery(self._reopenLiveView, self._restartLiveView,
+                                                 self._handleLiveViewRecovered, self._handleLiveViewLost,
+                                                 0 if recentlyRecovered else LiveViewRecovery.REOPEN_ATTEMPTS)
+        self.liveViewRecovery.start()
+
+    def _handleLiveViewError(self, stream):
+        """Called in live view thread when reading a frame failed."""
+        with self.liveViewLock:
+            if stream is not self.liveViewStream:
+                # Stream was replaced or stopped meanwhile.
+                return
+
+            self.liveViewStream = None
+            self.liveViewActive = False
+
+            if self.recoverLiveView:
+                self._startRecovery()
+                return
+
+        if self.liveViewErrorCallback:
+            self.liveViewErrorCallback()
+
+    def _refreshAvailableApiList(self):
+        """After a change of mode the list still held is the old mode's, until the watcher reports the new one.
+        Fetch it now; if that fails the list is unknown and nothing is rejected locally."""
+        self.availableApiList = None
+
+        if self.stateWatcher and self.stateWatcher.refresh():
+            self.availableApiList = self.cameraState.availableApiList
+
+    def isAvailable(self, methodStr):
+        """False if methodStr is not in the camera's available API list.  Everything is while the list is unknown."""
+        availableApiList = self.availableApiList
+
+        return availableApiList is None or methodStr in availableApiList or methodStr in CameraClient.ALWAYS_AVAILABLE
+
+    def call(self, methodStr, paramsList, timeout=None):
+        """Send a camera command and wait for its result, None on failure.
+
+        A command the camera does not accept in its current state fails at once, without being sent."""
+        if not self.isAvailable(methodStr):
+            print("ERROR: %s not available in current camera state" % methodStr)
+            return None
+
+        return self.rpc.call(methodStr, paramsList, timeout)
+
+    def callAsync(self, methodStr, paramsList, callback=None):
+        """Send a camera command without waiting.  Returns a Future of its result, see call()."""
+        if not self.isAvailable(methodStr):
+            print("ERROR: %s not available in current camera state" % methodStr)
+
+            future = Future()
+            future.set_result(None)
+
+            if callback:
+                callback(None)
+
+            return future
+
+        return self.rpc.callAsync(methodStr, paramsList, callback)
+
+    def waitForIdle(self, timeout=CAPTURE_TIMEOUT):
+        """Wait until the camera is IDLE.  Returns False on timeout.
+
+        The cache is refreshed first: right after a command it may still read IDLE from before the camera got
+        busy."""
+        if self.stateWatcher:
+            self.stateWatcher.refresh()
+
+        return self.cameraState.waitFor(lambda state: state.cameraStatus == 'IDLE', timeout)
+
+    def commandStats(self):
+        """Camera command counters and round-trip latencies, see ConnectionPool.stats()."""
+        if self.commandPool:
+            return self.commandPool.stats()
+
+        return {}
+
+    def setShootMode(self, mode):
+        """Returns True on success."""
+        # Preconditions are checked against the cached camera state, no getEvent round trip.
+        cameraStatus = self.cameraState.cameraStatus
+
+        if cameraStatus == 'IDLE':
+            ret = self.call("setShootMode", [mode])
+
+            if not ret or ret[0] != 0:
+                print("ERROR: Unsuccessful change of shoot mode to %s" % mode)
+                return False
+
+            self._refreshAvailableApiList()
+            return True
+
+        print("ERROR: Operation aborted, camera not in IDLE state, current state: %s" % cameraStatus)
+        return False
+
+    def setStillSize(self, aspect, size):
+        """Returns True on success."""
+        ret = self.call("setStillSize", ['%s' % aspect, '%s' % size])
+
+        if not ret or ret[0] != 0:
+            print("ERROR: Unsuccessful change of still size to %s %s" % (aspect, size))
+            return False
+
+        return True
+
+    def startMovieRec(self):
+        """Returns True on success."""
+        cameraStatus = self.cameraState.cameraStatus
+
+        if cameraStatus == 'IDLE':
+
+            if self.cameraState.shootMode == 'movie':
+                ret = self.call("startMovieRec", [])
+
+                if not ret or ret[0] != 0:
+                    print("ERROR: Cannot start Movie recording")
+                    return False
+
+                self._refreshAvailableApiList()
+                return True
+
+            print("ERROR: Shooting mode must be set to Movie before start recording")
+
+        else:
+            print("ERROR: Operation [StartMovieRec] aborted, camera not in IDLE state, current state: %s" % cameraStatus)
+
+        return False
+
+    def stopMovieRec(self):
+        """Returns True on success."""
+        cameraStatus = self.cameraState.cameraStatus
+
+        if cameraStatus == 'MovieRecording':
+            if self.call("stopMovieRec", []) is None:
+                return False
+
+            self._refreshAvailableApiList()
+            return True
+
+        print("ERROR: Operation [StopMovieRec] aborted, camera not in MovieRecording state, current state: %s" % cameraStatus)
+        return False
+
+    def takePhoto(self, progress=None, shutterCallback=None):
+        """Take a photo and download it.  Returns its path if photoStorage is set, else the JPEG data; None on failure.
+
+        progress(bytes received, total) follows the download, shutterCallback(when) is called as soon as the camera
+        confirmed the capture with the time.monotonic() it did, or with None if it did not."""
+        cameraStatus = self.cameraState.cameraStatus
+
+        if cameraStatus != 'IDLE':
+            print("ERROR: Operation [TakePicture] aborted, camera not in IDLE state, current state: %s" % cameraStatus)
+
+            if shutterCallback:
+                shutterCallback(None)
+
+            return None
+
+        snapShot = self.call("actTakePicture", [])
+
+        if shutterCallback:
+            # Time the camera confirmed the capture, None if it did not.
+            shutterCallback(time.monotonic() if snapShot else None)
+
+        # Wait for camera to complete taking photo.
+        if not self.waitForIdle():
+            print("ERROR: Camera did not return to IDLE state after taking picture")
+            return None
+
+        if not snapShot:
+            return None
+
+        if self.photoStorage:
+            return self.downloadPhotoToFile(snapShot[0][0], self.photoBuffer, progress)
+
+        return self.downloadPhoto(snapShot[0][0], self.photoBuffer, progress)
+
+    def takeBurst(self, count, interval=0.0, photoCallback=None):
+        """Shoot count photos, one every interval seconds.  photoCallback gets each path or JPEG, see takePhoto().
+
+        Returns the BurstShooter stats."""
+        # Downloads run in the burst's own downloader thread, give them their own buffer.
+        downloadBuffer = RecvBuffer()
+
+        if self.photoStorage:
+            download = lambda url: self.downloadPhotoToFile(url, downloadBuffer)
+
+        else:
+            download = lambda url: self.downloadPhoto(url, downloadBuffer)
+
+        shooter = BurstShooter(self, download, photoCallback or (lambda photo: None))
+
+        stats = shooter.run(count, interval)
+        print("Burst: %(shots)d/%(requested)d shots, %(failed)d failed, %(shotsPerSecond).2f shots/s, %(sustainedShotsPerSecond).2f shots/s including download" % stats)
+
+        return stats
+
+    def downloadPhoto(self, url, recvBuffer=None, progress=None):
+        """Download postview image at url.  Returns the JPEG data or None.
+
+        progress, if given, is called with bytes received so far and total size."""
+        recvBuffer = recvBuffer or RecvBuffer()
+
+        image = None
+        sock, payloadLength = self._openPhoto(url)
+
+        if sock:
+            if progress and payloadLength:
+                data = recvBuffer.fill(sock, payloadLength, progress=lambda numBytesReceived: progress(numBytesReceived, payloadLength))
+
+            else:
+                data = recvBuffer.fill(sock, payloadLength)
+
+            if data is not None:
+                image = bytes(data)
+
+            sock.close()
+
+        return image
+
+    def downloadPhotoToFile(self, url, recvBuffer=None, progress=None):
+        """Stream postview image at url into photoStorage.  Returns path of the new file or None.
+
+        Data goes from socket to disk in DOWNLOAD_CHUNK_SIZE pieces through recvBuffer, so memory use does not depend
+        on image size.  The file only appears under its final name once it is complete."""
+        recvBuffer = recvBuffer or RecvBuffer()
+
+        sock, payloadLength = self._openPhoto(url)
+
+        if not sock:
+            return None
+
+        try:
+            fd, tempPath = tempfile.mkstemp(suffix='.part', dir=self.photoStorage.directory)
+
+        except OSError as msg:
+            print("Unable to create file in %s: %s" % (self.photoStorage.directory, msg))
+            sock.close()
+            return None
+
+        remainingBytesToGet = payloadLength
+
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while remainingBytesToGet:
+                    data = recvBuffer.fill(sock, min(remainingBytesToGet, CameraClient.DOWNLOAD_CHUNK_SIZE))
+
+                    if data is None:
+                        break
+
+                    f.write(data)
+                    remainingBytesToGet -= len(data)
+
+                    if progress:
+                        progress(payloadLength - remainingBytesToGet, payloadLength)
+
+        except OSError as msg:
+            print("Unable to write file %s: %s" % (tempPath, msg))
+            remainingBytesToGet = payloadLength
+
+        finally:
+            sock.close()
+
+        if remainingBytesToGet or not payloadLength:
+            os.remove(tempPath)
+            return None
+
+        try:
+            return self.photoStorage.commitFile(tempPath)
+
+        except OSError as msg:
+            print("Unable to store file %s: %s" % (tempPath, msg))
+            os.remove(tempPath)
+            return None
+
+    def _openPhoto(self, url):
+        """Request postview image at url.  Returns (socket positioned at start of image data, image size) or (None, 0)."""
+        # Get IP address and port number of postview image on camera.
+        location = sonyprotocol.splitUrl(url)
+
+        if not location:
+            return None, 0
+
+        HOST, PORT, imagePath = location
+
+        sock = self._createSockAndSend((socket.AF_INET, socket.SOCK_STREAM), HOST, PORT, sonyprotocol.httpGetRequest(imagePath, HOST))
+
+        if not sock:
+            return None, 0
+
+        return sock, sonyprotocol.getMessageLengthField(self._recvHttpHeader(sock))
+
+    def _recvHttpHeader(self, sock):
+        """Receive an HTTP response header, and nothing of the body that may follow in the same packet.
+
+        Returns the header, b'' on error."""
+        header = b''
+
+        try:
+            while len(header) < CameraClient.CHUNK_SIZE:
+                # Look at what has arrived without taking it, then take exactly the header part.
+                data = sock.recv(CameraClient.CHUNK_SIZE, socket.MSG_PEEK)
+
+                if not data:
+                    return b''
+
+                # End of header may straddle the previous read.
+                end = (header[-3:] + data).find(b'\r\n\r\n')
+
+                if end >= 0:
+                    return header + sock.recv(end + 4 - len(header[-3:]))
+
+                header += sock.recv(len(data))
+
+        except socket.error:
+            pass
+
+        return b''
+
+    def _createSockAndSend(self, socketType, HOST, PORT, data, timeout=8.0):
+        try:
+            sock = socket.socket(*socketType)
+
+        except socket.error:
+            return None
+
+        try:
+            sock.settimeout(timeout)
+            sock.connect((HOST, PORT))
+
+        except socket.error:
+            sock.close()
+            return None
+
+        try:
+            sock.send(data)
+
+        except socket.error:
+            sock.close()
+            return None
+
+        return sock
+
+    def _recvAllData(self, sock, totalNumBytesToGet):
+        # Receive straight into a buffer of the final size instead of concatenating chunks.
+        payload = RecvBuffer(totalNumBytesToGet).fill(sock, totalNumBytesToGet)
+
+        # Returns empty string if the socket failed before all data arrived.
+        if payload is None:
+            return b''
+
+        return bytes(payload)
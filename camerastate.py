@@ -0,0 +1,139 @@
+import threading
+
+
+class CameraState(object):
+    """Cached camera state, kept up to date from getEvent results.
+
+    getEvent returns a list of entries, each tagged with a 'type'.  Entries are looked up by that type rather than
+    by position, so the cache does not care which API version produced them."""
+
+    # getEvent entry type -> (attribute name, key holding the value inside the entry).
+    FIELDS = {
+                 'availableApiList':  ('availableApiList', 'names'),
+                 'cameraStatus':      ('cameraStatus', 'cameraStatus'),
+                 'zoomInformation':   ('zoomPosition', 'zoomPosition'),
+                 'liveviewStatus':    ('liveviewStatus', 'liveviewStatus'),
+                 'takePicture':       ('takePictureUrl', 'takePictureUrl'),
+                 'shootMode':         ('shootMode', 'currentShootMode'),
+                 'stillSize':         ('stillSize', None),
+                 'postviewImageSize': ('postviewImageSize', 'currentPostviewImageSize'),
+                 'selfTimer':         ('selfTimer', 'currentSelfTimer'),
+                 'storageInformation': ('storageInformation', None),
+             }
+
+    def __init__(self):
+        self.condition = threading.Condition()
+
+        self.availableApiList = None
+        self.cameraStatus = None
+        self.zoomPosition = None
+        self.liveviewStatus = None
+        self.takePictureUrl = None
+        self.shootMode = None
+        self.stillSize = None
+        self.postviewImageSize = None
+        self.selfTimer = None
+        self.storageInformation = None
+
+    def update(self, eventResult):
+        """Merge a getEvent result into the cache.  Returns dict of attribute name -> new value for fields that changed."""
+        changed = {}
+
+        with self.condition:
+            for entry in eventResult:
+                # Some entries are lists of objects, e.g. takePicture and storageInformation.
+                items = entry if isinstance(entry, list) else [entry]
+                items = [item for item in items if isinstance(item, dict) and item.get('type') in CameraState.FIELDS]
+
+                if not items:
+                    continue
+
+                attribute, key = CameraState.FIELDS[items[0]['type']]
+
+                if key is None:
+                    # Keep the whole entry, minus its type tag.
+                    value = [dict((k, v) for k, v in item.items() if k != 'type') for item in items]
+                    value = value[0] if len(value) == 1 else value
+
+                else:
+                    value = items[0].get(key)
+
+                if value != getattr(self, attribute):
+                    setattr(self, attribute, value)
+                    changed[attribute] = value
+
+            if changed:
+                self.condition.notify_all()
+
+        return changed
+
+    def waitFor(self, predicate, timeout):
+        """Wait until predicate(state) is true.  Returns False on timeout."""
+        with self.condition:
+            return self.condition.wait_for(lambda: predicate(self), timeout)
+
+
+class CameraStateWatcher(threading.Thread):
+    """Keeps a CameraState up to date with long-polling getEvent calls.
+
+    The camera holds a long-polling getEvent until something changes, so this costs no round trips while the camera
+    is idle.  changedCallback is called in this thread with the dict of changed fields, or in the caller's thread by
+    refresh().
+
+    rpc should be on a connection pool of its own, long polls last seconds and would swamp the command latencies
+    measured by the pool."""
+
+    LONG_POLL_TIMEOUT = 60.0
+    RETRY_INTERVAL    = 1.0
+
+    def __init__(self, rpc, state, changedCallback):
+        super(CameraStateWatcher, self).__init__(name='CameraStateWatcher')
+        self.daemon = True
+
+        self.rpc = rpc
+        self.state = state
+        self.changedCallback = changedCallback
+        self.stopEvent = threading.Event()
+
+    def run(self):
+        # First call returns the full state straight away, later ones block until something changes.
+        longPoll = self.state.cameraStatus is not None
+
+        while not self.stopEvent.is_set():
+            eventResult = self.rpc.call("getEvent", [longPoll], CameraStateWatcher.LONG_POLL_TIMEOUT)
+
+            if self.stopEvent.is_set():
+                break
+
+            if eventResult is None:
+                # Camera busy or link down, do not hammer it.
+                longPoll = False
+                self.stopEvent.wait(CameraStateWatcher.RETRY_INTERVAL)
+                continue
+
+            changed = self.state.update(eventResult)
+
+            if changed:
+                self.changedCallback(changed)
+
+            longPoll = True
+
+    def refresh(self):
+        """Fetch the current state at once instead of waiting for the long poll to report it.
+
+        The cache can lag a command that has just returned, e.g. still read IDLE right after actTakePicture.
+        Returns False if the camera did not answer."""
+        eventResult = self.rpc.call("getEvent", [False])
+
+        if eventResult is None:
+            return False
+
+        changed = self.state.update(eventResult)
+
+        if changed:
+            self.changedCallback(changed)
+
+        return True
+
+    def stop(self):
+        self.stopEvent.set()
@@ -0,0 +1,51 @@
+import time
+
+from discovery import JsonFileCache
+
+
+def cameraKey(SSDPInfo):
+    """Cache key of a camera, its USN, or its description location if it sent none."""
+    return SSDPInfo.get('usn') or SSDPInfo.get('location')
+
+
+class CapabilityCache(JsonFileCache):
+    """What each camera can do, kept on disk so it is known the moment the camera is connected.
+
+    Entries are keyed by USN and hold the firmware, as reported by getApplicationInfo, they were fetched from,
+    and the supported still sizes.  The available API list is not kept, it changes with the camera's mode and comes
+    with the first getEvent anyway.  An entry from other firmware is replaced as soon as the camera reports its
+    version, so a firmware update never leaves stale capabilities behind."""
+
+    FILE_NAME = 'capabilities.json'
+
+    def lookup(self, SSDPInfo, firmware=None):
+        """Cached capabilities of the camera, None if unknown.  With firmware given, only an entry from it matches."""
+        with self.lock:
+            entry = self._load().get(cameraKey(SSDPInfo))
+
+        if not isinstance(entry, dict) or (firmware is not None and entry.get('firmware') != firmware):
+            return None
+
+        return entry
+
+    def store(self, SSDPInfo, firmware=None, **capabilities):
+        """Add or update capabilities of the camera, e.g. store(SSDPInfo, '2.1.4', supportedStillSizes=sizes).
+
+        Capabilities not given are kept, unless firmware changed, which drops everything fetched from the old one."""
+        key = cameraKey(SSDPInfo)
+
+        if not key:
+            return
+
+        with self.lock:
+            entries = self._load()
+            entry = entries.get(key)
+
+            if not isinstance(entry, dict) or (firmware is not None and entry.get('firmware') != firmware):
+                entry = {'firmware': firmware}
+
+            entry.update(capabilities)
+            entry['updated'] = time.time()
+            entries[key] = entry
+
+            self._save(entries)
@@ -0,0 +1,154 @@
+"""Headless command line remote for Sony Camera Remote API cameras, no Qt needed.
+
+    python ./cli.py shoot
+    python ./cli.py burst 10 --interval 0.5
+    python ./cli.py record-liveview liveview.mjpeg --duration 60
+    python ./cli.py set-still-size 4:3 18M
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+from cameraclient import CameraClient
+from capabilitycache import CapabilityCache
+from discovery import DiscoveryCache
+from photostorage import PhotoStorage
+
+
+def shoot(client, args):
+    for shot in range(args.count):
+        path = client.takePhoto()
+
+        if not path:
+            print("ERROR: Photo %d failed" % (shot + 1))
+            return 1
+
+        print(path)
+
+    return 0
+
+
+def burst(client, args):
+    stats = client.takeBurst(args.count, args.interval, print)
+
+    return 0 if stats['downloaded'] == args.count else 1
+
+
+def recordLiveView(client, args):
+    # Imported here, the other commands do not need it.
+    from liveviewrecorder import LiveViewRecorder
+
+    failed = threading.Event()
+    client.liveViewErrorCallback = failed.set
+
+    try:
+        recorder = LiveViewRecorder(args.path)
+
+    except OSError as msg:
+        print("ERROR: Unable to record to %s: %s" % (args.path, msg))
+        return 1
+
+    recorder.start()
+    client.liveViewRecorder = recorder
+
+    if not client.startLiveView():
+        print("ERROR: Unable to start live view")
+        client.liveViewRecorder = None
+        recorder.close()
+        return 1
+
+    start = time.monotonic()
+
+    try:
+        while args.duration is None or time.monotonic() - start < args.duration:
+            if failed.wait(0.5):
+                failed.clear()
+                print("Live view stream failed, restarting")
+                client.startLiveView()
+
+    except KeyboardInterrupt:
+        pass
+
+    client.stopLiveView()
+    client.liveViewRecorder = None
+    recorder.close()
+
+    print("Recorded %d frames, %d bytes to %s, %d dropped" % (recorder.numFrames, recorder.numBytes, args.path, recorder.numDropped))
+
+    return 0
+
+
+def setStillSize(client, args):
+    if args.aspect is None:
+        for size in client.supportedStillSizes or []:
+            print("%s %s" % (size['aspect'], size['size']))
+
+        return 0
+
+    return 0 if client.setStillSize(args.aspect, args.size) else 1
+
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(description="Remote control a Sony camera without GUI.")
+    parser.add_argument('--dir', default='DCIM', help="directory photos are saved in (default: %(default)s)")
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+
+    command = commands.add_parser('shoot', help="take photos and download them")
+    command.add_argument('--count', '-n', type=int, default=1, help="number of photos (default: %(default)s)")
+    command.set_defaults(run=shoot)
+
+    command = commands.add_parser('burst', help="take photos as fast as the camera allows")
+    command.add_argument('count', type=int, help="number of photos")
+    command.add_argument('--interval', type=float, default=0.0, help="seconds between shots (default: as fast as possible)")
+    command.set_defaults(run=burst)
+
+    command = commands.add_parser('record-liveview', help="record live view to an MJPEG file with seek index")
+    command.add_argument('path', help="output file")
+    command.add_argument('--duration', type=float, help="seconds to record (default: until Ctrl-C)")
+    command.set_defaults(run=recordLiveView)
+
+    command = commands.add_parser('set-still-size', help="set still photo size, list supported sizes without arguments")
+    command.add_argument('aspect', nargs='?', help="aspect ratio, e.g. 4:3")
+    command.add_argument('size', nargs='?', help="size, e.g. 18M")
+    command.set_defaults(run=setStillSize)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'set-still-size' and (args.aspect is None) != (args.size is None):
+        parser.error("set-still-size needs both aspect and size")
+
+    return args
+
+
+def main(argv):
+    args = parseArguments(argv)
+
+    if not os.path.isdir(args.dir):
+        os.makedirs(args.dir)
+
+    photoStorage = PhotoStorage(args.dir, numWorkers=1, durability=PhotoStorage.DURABILITY_FILE)
+
+    client = CameraClient()
+    client.photoStorage = photoStorage
+    client.discoveryCache = DiscoveryCache()
+    client.capabilityCache = CapabilityCache()
+
+    try:
+        if not client.connect(startLiveView=False):
+            print("ERROR: Camera not found")
+            return 1
+
+        return args.run(client, args)
+
+    finally:
+        client.close()
+        photoStorage.close()
+
+
+#Run this as a script if running stand alone
+if __name__=="__main__":
+    sys.exit(main(sys.argv[1:]))
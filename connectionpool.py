@@ -0,0 +1,191 @@
+import http.client
+import select
+import threading
+import time
+
+from collections import deque
+
+
+class _SendError(ConnectionError):
+    """A stale connection failed while the request was being sent."""
+
+
+class ConnectionPool(object):
+    """Pool of persistent HTTP/1.1 keep-alive connections to one camera endpoint.
+
+    Connections are reused across calls.  Idle connections the camera has closed, or that were idle too long, are
+    detected before reuse and replaced; a request that fails because a kept-alive connection went stale is retried
+    once on a fresh connection, unless that could run a command twice, see post().  Round-trip latency of every call
+    is recorded, see stats()."""
+
+    MAX_IDLE_TIME        = 10.0
+    MAX_IDLE_CONNECTIONS = 4
+    NUM_LATENCY_SAMPLES  = 200
+
+    # Errors meaning the camera dropped a kept-alive connection before answering.
+    STALE_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine, BrokenPipeError, ConnectionResetError, ConnectionAbortedError, _SendError)
+
+    def __init__(self, host, port, timeout=8.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+        self.lock = threading.Lock()
+        self.idle = []
+
+        self.latencies = deque(maxlen=ConnectionPool.NUM_LATENCY_SAMPLES)
+        self.lastLatency = None
+        self.numCalls = 0
+        self.numConnects = 0
+        self.numReused = 0
+        self.numStale = 0
+
+    def post(self, path, body, timeout=None, idempotent=False):
+        """POST body to path, returns the response body or None on failure, including a non-2xx status.
+
+        A request that failed on a kept-alive connection is sent again on a fresh one only if it cannot have reached
+        the camera, i.e. sending it failed, or if idempotent is set: once sent, a dropped connection does not tell
+        whether the camera ran the command."""
+        start = time.perf_counter()
+        conn, reused = self._acquire()
+
+        try:
+            data, keepAlive = self._roundTrip(conn, path, body, timeout)
+
+        except ConnectionPool.STALE_ERRORS as error:
+            conn.close()
+
+            if not reused or not (isinstance(error, _SendError) or idempotent):
+                return None
+
+            # Transparent reconnect, camera closed the kept-alive connection behind our back.
+            self._count('numStale')
+            conn = self._connect()
+
+            try:
+                data, keepAlive = self._roundTrip(conn, path, body, timeout)
+
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                return None
+
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            return None
+
+        self._recordLatency(time.perf_counter() - start)
+
+        if keepAlive:
+            self._release(conn)
+
+        else:
+            conn.close()
+
+        return data
+
+    def close(self):
+        """Close all idle connections."""
+        with self.lock:
+            idle, self.idle = self.idle, []
+
+        for conn, lastUsed in idle:
+            conn.close()
+
+    def stats(self):
+        """Call counters and round-trip latency figures in seconds."""
+        with self.lock:
+            samples = sorted(self.latencies)
+
+            result = {
+                         'calls': self.numCalls,
+                         'connects': self.numConnects,
+                         'reused': self.numReused,
+                         'stale': self.numStale,
+                         'lastLatency': self.lastLatency,
+                     }
+
+        if samples:
+            result['meanLatency'] = sum(samples) / len(samples)
+            result['p50Latency'] = samples[len(samples) // 2]
+            result['p95Latency'] = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+        return result
+
+    def _roundTrip(self, conn, path, body, timeout):
+        if conn.sock:
+            conn.sock.settimeout(timeout or self.timeout)
+
+        conn.timeout = timeout or self.timeout
+
+        try:
+            conn.request('POST', path, body)
+
+        except ConnectionPool.STALE_ERRORS as error:
+            # Not sent, or not completely, the camera cannot have acted on it.
+            raise _SendError(error)
+
+        response = conn.getresponse()
+        data = response.read()
+
+        if not 200 <= response.status < 300:
+            # E.g. a 503 with an HTML page while the camera is busy, not a command response.
+            print("Camera answered %d %s" % (response.status, response.reason))
+            data = None
+
+        return data, not response.will_close
+
+    def _acquire(self):
+        """Returns (connection, reused)."""
+        now = time.monotonic()
+
+        while True:
+            with self.lock:
+                if not self.idle:
+                    break
+
+                conn, lastUsed = self.idle.pop()
+
+            if now - lastUsed < ConnectionPool.MAX_IDLE_TIME and not self._isStale(conn):
+                self._count('numReused')
+                return conn, True
+
+            conn.close()
+            self._count('numStale')
+
+        return self._connect(), False
+
+    def _release(self, conn):
+        with self.lock:
+            if len(self.idle) < ConnectionPool.MAX_IDLE_CONNECTIONS:
+                self.idle.append((conn, time.monotonic()))
+                conn = None
+
+        if conn:
+            conn.close()
+
+    def _connect(self):
+        self._count('numConnects')
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _isStale(self, conn):
+        """An idle connection should have nothing to read.  If it is readable the camera closed it or sent garbage."""
+        if not conn.sock:
+            return True
+
+        try:
+            readable, _, _ = select.select([conn.sock], [], [], 0)
+
+        except (OSError, ValueError):
+            return True
+
+        return bool(readable)
+
+    def _count(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _recordLatency(self, latency):
+        with self.lock:
+            self.numCalls += 1
+            self.lastLatency = latency
+            self.latencies.append(latency)
@@ -0,0 +1,216 @@
+import json
+import os
+import socket
+import threading
+import time
+
+from queue import Queue
+
+import sonyprotocol
+
+
+def maxAge(SSDPInfo, default=1800):
+    """Seconds an SSDP response stays valid, from its cache-control field."""
+    for directive in SSDPInfo.get('cache-control', '').split(','):
+        name, _, value = directive.strip().partition('=')
+
+        if name.lower() == 'max-age':
+            try:
+                return int(value)
+
+            except ValueError:
+                break
+
+    return default
+
+
+class Discovery(threading.Thread):
+    """Collects every SSDP response to an M-SEARCH within a time window, in the background.
+
+    The search is sent retries times, spread over the window, since UDP may lose it.  Each new responder's SSDPInfo
+    is put on responses as it arrives, so the first camera can be used at once; None follows the last one.  Once
+    the window is over doneCallback, if given, is called in this thread with the list of all responders."""
+
+    MAX_RESPONSE_SIZE = 8192
+
+    def __init__(self, service=sonyprotocol.SERVICE, ssdpIp=sonyprotocol.SSDP_IP, ssdpPort=sonyprotocol.SSDP_PORT,
+                 window=3.0, retries=3, doneCallback=None):
+        super(Discovery, self).__init__(name='Discovery')
+        self.daemon = True
+
+        self.service = service
+        self.ssdpIp = ssdpIp
+        self.ssdpPort = ssdpPort
+        self.window = window
+        self.retries = retries
+        self.doneCallback = doneCallback
+
+        self.responses = Queue()
+        self.responders = []
+
+    def run(self):
+        try:
+            self._collect()
+
+        finally:
+            self.responses.put(None)
+
+            if self.doneCallback:
+                self.doneCallback(self.responders)
+
+    def _collect(self):
+        message = sonyprotocol.ssdpSearchMessage(self.service, self.ssdpIp, self.ssdpPort)
+
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+
+        except socket.error:
+            return
+
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
+
+            start = time.monotonic()
+            deadline = start + self.window
+            sendTimes = [start + i * self.window / self.retries for i in range(self.retries)]
+            seen = set()
+
+            while True:
+                now = time.monotonic()
+
+                if now >= deadline:
+                    break
+
+                if sendTimes and now >= sendTimes[0]:
+                    sendTimes.pop(0)
+
+                    try:
+                        sock.sendto(message, (self.ssdpIp, self.ssdpPort))
+
+                    except socket.error as msg:
+                        print("SSDP search failed: %s" % msg)
+
+                sock.settimeout(max(0.001, min([deadline] + sendTimes[:1]) - now))
+
+                try:
+                    response, address = sock.recvfrom(Discovery.MAX_RESPONSE_SIZE)
+
+                except socket.timeout:
+                    continue
+
+                except socket.error:
+                    break
+
+                SSDPInfo = sonyprotocol.parseSSDPResponse(response.decode('utf8', 'replace'))
+
+                if 'location' not in SSDPInfo:
+                    continue
+
+                # Every search is answered again, report each camera once.
+                key = SSDPInfo.get('usn', SSDPInfo['location'])
+
+                if key not in seen:
+                    seen.add(key)
+                    self.responders.append(SSDPInfo)
+                    self.responses.put(SSDPInfo)
+
+        finally:
+            sock.close()
+
+
+class JsonFileCache(object):
+    """A dict of entries kept in a JSON file in the user's cache directory, shared by the camera caches."""
+
+    FILE_NAME = 'cache.json'
+
+    def __init__(self, path=None):
+        self.path = path or self.defaultPath()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def defaultPath(cls):
+        cacheDir = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+
+        return os.path.join(cacheDir, 'qx10remote', cls.FILE_NAME)
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+
+        except (IOError, OSError, ValueError):
+            return {}
+
+        return entries if isinstance(entries, dict) else {}
+
+    def _save(self, entries):
+        tempPath = '%s.%d.tmp' % (self.path, os.getpid())
+
+        try:
+            directory = os.path.dirname(self.path)
+
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+
+            with open(tempPath, 'w') as f:
+                json.dump(entries, f, indent=2)
+
+            # Readers never see a half written file.
+            os.replace(tempPath, self.path)
+
+        except (IOError, OSError) as msg:
+            print("Unable to save %s: %s" % (self.path, msg))
+
+
+class DiscoveryCache(JsonFileCache):
+    """Cameras found before, with their service URLs, kept on disk until their SSDP max-age runs out.
+
+    Entries are keyed by USN.  A cached camera can be contacted straight away instead of waiting for discovery and
+    fetching its device description again."""
+
+    FILE_NAME = 'cameras.json'
+
+    def lookup(self, service=sonyprotocol.SERVICE):
+        """Unexpired entries for service, most recently seen first."""
+        now = time.time()
+
+        with self.lock:
+            entries = self._load()
+
+        entries = [entry for entry in entries.values() if entry.get('st') == service and entry.get('expires', 0) > now]
+
+        return sorted(entries, key=lambda entry: entry.get('lastSeen', 0), reverse=True)
+
+    def store(self, SSDPInfo, serviceUrls=None):
+        """Add or refresh a camera.  serviceUrls are kept from before if not given and the location did not change."""
+        self.storeAll([SSDPInfo], {SSDPInfo['location']: serviceUrls} if serviceUrls else {})
+
+    def storeAll(self, responders, serviceUrls=None):
+        """Add or refresh many cameras at once.  serviceUrls maps location -> service URLs for those known."""
+        serviceUrls = serviceUrls or {}
+        now = time.time()
+
+        with self.lock:
+            entries = self._load()
+
+            for SSDPInfo in responders:
+                key = SSDPInfo.get('usn', SSDPInfo['location'])
+                previous = entries.get(key, {})
+
+                entry = dict(SSDPInfo)
+                entry['lastSeen'] = now
+                entry['expires'] = now + maxAge(SSDPInfo)
+
+                if SSDPInfo['location'] in serviceUrls:
+                    entry['serviceUrls'] = serviceUrls[SSDPInfo['location']]
+
+                elif previous.get('location') == SSDPInfo['location'] and 'serviceUrls' in previous:
+                    entry['serviceUrls'] = previous['serviceUrls']
+
+                entries[key] = entry
+
+            # Forget what has expired.
+            entries = dict((key, entry) for key, entry in entries.items() if entry.get('expires', 0) > now)
+
+            self._save(entries)
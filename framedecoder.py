@@ -0,0 +1,56 @@
+import threading
+
+from PyQt4.QtCore import Qt
+from PyQt4.QtGui import QImage
+
+from latestframe import LatestFrameSlot
+
+
+class FrameDecoder(threading.Thread):
+    """Decodes live view JPEGs to QImage outside the GUI thread.
+
+    submit() drops frames the decoder has not started on yet, and decoded frames wait in a single slot that the
+    display side polls, so at most one frame is queued on either side and latency cannot build up.
+
+    With targetSize, a QSize, set every frame is also scaled to it here, with transformMode, so the display only
+    has to copy it to the screen.  Both may be changed from any thread, the next frame uses the new values."""
+
+    def __init__(self):
+        super(FrameDecoder, self).__init__(name='FrameDecoder')
+        self.daemon = True
+
+        self.encoded = LatestFrameSlot()
+        self.decoded = LatestFrameSlot()
+
+        self.targetSize = None
+        self.transformMode = Qt.SmoothTransformation
+
+    def submit(self, frame):
+        """Queue a LiveViewFrame for decoding."""
+        self.encoded.put(frame)
+
+    def latestImage(self):
+        """Newest (QImage, LiveViewFrame) not fetched before, or None."""
+        return self.decoded.poll()
+
+    def stop(self):
+        self.encoded.close()
+
+    def run(self):
+        while True:
+            frame = self.encoded.take()
+
+            if frame is None:
+                break
+
+            image = QImage.fromData(frame.data, 'JPG')
+
+            if image.isNull():
+                continue
+
+            targetSize = self.targetSize
+
+            if targetSize is not None and targetSize != image.size():
+                image = image.scaled(targetSize, Qt.IgnoreAspectRatio, self.transformMode)
+
+            self.decoded.put((image, frame))
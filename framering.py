@@ -0,0 +1,179 @@
+import threading
+
+from liveviewrecorder import INDEX_MAGIC, INDEX_RECORD, indexPath
+from liveviewstream import LiveViewFrame
+
+
+class FrameRing(object):
+    """The last live view frames, kept in a fixed amount of memory so they can be saved after the fact.
+
+    JPEGs are copied into one arena of byteBudget bytes allocated up front, their sequence numbers and times into a
+    preallocated table of index records, so no Python object is kept per frame and memory use never grows however
+    long it runs.  The oldest frames make room for new ones when either is full, or when they are more than
+    maxSeconds older than the newest.
+
+    dump() saves the frames in the LiveViewRecorder format, readable with LiveViewRecording.  Copying them out of
+    the ring takes a moment only, the file is written in the background."""
+
+    DEFAULT_BUDGET  = 32 * 1024 * 1024
+
+    # Table size is budget / MIN_FRAME_SIZE, smaller frames than that on average leave part of the arena unused.
+    MIN_FRAME_SIZE  = 4096
+
+    def __init__(self, byteBudget=DEFAULT_BUDGET, maxSeconds=None):
+        self.byteBudget = byteBudget
+        self.maxSeconds = maxSeconds
+        self.capacity = max(1, byteBudget // FrameRing.MIN_FRAME_SIZE)
+
+        self.lock = threading.Lock()
+        self.arena = bytearray(byteBudget)
+        self.records = bytearray(INDEX_RECORD.size * self.capacity)
+
+        # Oldest record, number of records and where the next frame goes in the arena.
+        self.first = 0
+        self.count = 0
+        self.writePos = 0
+        self.numBytes = 0
+
+        self.numFrames = 0
+        self.numEvicted = 0
+        self.numRejected = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, frame):
+        """Keep a LiveViewFrame.  Returns False if it is larger than the whole budget."""
+        data = frame.data
+        length = len(data)
+
+        if length > self.byteBudget:
+            self.numRejected += 1
+            return False
+
+        with self.lock:
+            pos = self.writePos
+
+            if pos + length > self.byteBudget:
+                # Does not fit before the end, the frames still up there are the oldest, make room from the start.
+                while self.count and self._record(0)[0] >= pos:
+                    self._evict()
+
+                pos = 0
+
+            while self.count and (self.count == self.capacity or self._overlaps(self._record(0), pos, length)):
+                self._evict()
+
+            if self.maxSeconds is not None:
+                while self.count and frame.receivedAt - self._record(0)[4] > self.maxSeconds:
+                    self._evict()
+
+            self.arena[pos:pos + length] = data
+
+            INDEX_RECORD.pack_into(self.records, ((self.first + self.count) % self.capacity) * INDEX_RECORD.size,
+                                   pos, length, frame.sequence, frame.timestamp, frame.receivedAt)
+
+            self.count += 1
+            self.writePos = pos + length
+            self.numBytes += length
+            self.numFrames += 1
+
+        return True
+
+    def duration(self):
+        """Seconds between the oldest and newest frame kept."""
+        with self.lock:
+            if not self.count:
+                return 0.0
+
+            return self._record(self.count - 1)[4] - self._record(0)[4]
+
+    def clear(self):
+        with self.lock:
+            self.first = 0
+            self.count = 0
+            self.writePos = 0
+            self.numBytes = 0
+
+    def frames(self, seconds=None):
+        """Copies of the frames of the last seconds, all if None, oldest first, as LiveViewFrames."""
+        data, records = self.snapshot(seconds)
+
+        return [LiveViewFrame(data[offset:offset + length], sequence, timestamp, receivedAt)
+                for offset, length, sequence, timestamp, receivedAt in records]
+
+    def snapshot(self, seconds=None):
+        """Copy the frames of the last seconds out of the ring.  Returns the JPEGs back to back as bytes and their
+        index records, (offset in those bytes, length, sequence, timestamp, receivedAt), oldest first."""
+        with self.lock:
+            if not self.count:
+                return b'', []
+
+            start = 0
+
+            if seconds is not None:
+                newest = self._record(self.count - 1)[4]
+
+                while start < self.count - 1 and newest - self._record(start)[4] > seconds:
+                    start += 1
+
+            records = [self._record(i) for i in range(start, self.count)]
+            data = bytearray(sum(record[1] for record in records))
+            arena = memoryview(self.arena)
+            offset = 0
+
+            for i, (pos, length, sequence, timestamp, receivedAt) in enumerate(records):
+                data[offset:offset + length] = arena[pos:pos + length]
+                records[i] = (offset, length, sequence, timestamp, receivedAt)
+                offset += length
+
+            arena.release()
+
+        return bytes(data), records
+
+    def dump(self, path, seconds=None, doneCallback=None):
+        """Save the frames of the last seconds, all if None, to path and path.idx in the background.
+
+        doneCallback(path, number of frames) is called once written, with None as path if that failed.  Returns the
+        writer thread."""
+        data, records = self.snapshot(seconds)
+
+        writer = threading.Thread(target=self._write, args=(path, data, records, doneCallback), name='FrameRingDump')
+        writer.daemon = True
+        writer.start()
+
+        return writer
+
+    def _write(self, path, data, records, doneCallback):
+        try:
+            with open(path, 'wb') as dataFile:
+                dataFile.write(data)
+
+            with open(indexPath(path), 'wb') as indexFile:
+                indexFile.write(INDEX_MAGIC)
+                indexFile.write(b''.join(INDEX_RECORD.pack(*record) for record in records))
+
+        except (IOError, OSError) as msg:
+            print("Unable to save live view frames to %s: %s" % (path, msg))
+            path = None
+
+        if doneCallback:
+            doneCallback(path, len(records))
+
+    def _record(self, index):
+        """Record index of the ring, 0 is the oldest.  Call with lock held."""
+        return INDEX_RECORD.unpack_from(self.records, ((self.first + index) % self.capacity) * INDEX_RECORD.size)
+
+    def _evict(self):
+        """Forget the oldest frame.  Call with lock held."""
+        self.numBytes -= self._record(0)[1]
+        self.first = (self.first + 1) % self.capacity
+        self.count -= 1
+        self.numEvicted += 1
+
+        if not self.count:
+            self.writePos = 0
+
+    @staticmethod
+    def _overlaps(record, pos, length):
+        return record[0] < pos + length and pos < record[0] + record[1]
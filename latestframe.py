@@ -0,0 +1,44 @@
+import threading
+
+
+class LatestFrameSlot(object):
+    """Single-slot mailbox where the newest item wins.
+
+    put() never blocks and replaces an item nobody has taken yet, so a slow consumer always works on the most recent
+    frame instead of a growing backlog.  Replaced items are counted in numDropped."""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.item = None
+        self.closed = False
+        self.numDropped = 0
+
+    def put(self, item):
+        with self.condition:
+            if self.item is not None:
+                self.numDropped += 1
+
+            self.item = item
+            self.condition.notify()
+
+    def take(self, timeout=None):
+        """Wait for an item and remove it.  Returns None on timeout or once the slot is closed."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.item is not None or self.closed, timeout)
+
+            item, self.item = self.item, None
+
+            return item
+
+    def poll(self):
+        """Remove and return the item if there is one, None otherwise."""
+        with self.condition:
+            item, self.item = self.item, None
+
+            return item
+
+    def close(self):
+        """Wake up and release waiting consumers for good."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
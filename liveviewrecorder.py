@@ -0,0 +1,174 @@
+import os
+import struct
+import threading
+
+from bisect import bisect_left
+from queue import Queue, Full
+
+from liveviewstream import LiveViewFrame
+
+
+INDEX_MAGIC    = b'LVIDX001'
+
+# One index record per frame: data file offset, JPEG length, sequence number, camera timestamp (ms), arrival time.
+INDEX_RECORD   = struct.Struct('<QIIId')
+
+
+def indexPath(path):
+    return path + '.idx'
+
+
+class LiveViewRecorder(threading.Thread):
+    """Appends live view JPEGs to a file exactly as received, nothing is decoded or re-encoded.
+
+    The data file is a plain concatenation of JPEGs (raw MJPEG, which e.g. ffmpeg and VLC play as is).  Next to it
+    path.idx holds a fixed size record per frame, so any frame of a long recording is found in O(1).
+
+    submit() only queues the frame, all disk writes happen in this thread.  If the disk falls behind the queue fills
+    up and frames are left out of the recording, counted in numDropped, rather than stalling the live view."""
+
+    def __init__(self, path, maxQueued=64):
+        super(LiveViewRecorder, self).__init__(name='LiveViewRecorder')
+        self.daemon = True
+
+        self.path = path
+        self.queue = Queue(maxQueued)
+        self.closed = False
+
+        self.numFrames = 0
+        self.numBytes = 0
+        self.numDropped = 0
+
+        self.dataFile = open(path, 'wb', buffering=1024 * 1024)
+        self.indexFile = open(indexPath(path), 'wb')
+        self.indexFile.write(INDEX_MAGIC)
+
+    def submit(self, frame):
+        """Queue a LiveViewFrame for recording.  Returns False if it was dropped."""
+        if self.closed:
+            return False
+
+        try:
+            self.queue.put_nowait(frame)
+
+        except Full:
+            self.numDropped += 1
+            return False
+
+        return True
+
+    def close(self):
+        """Write the remaining frames and close the files."""
+        if self.closed:
+            return
+
+        self.closed = True
+        self.queue.put(None)
+        self.join()
+
+    def run(self):
+        try:
+            while True:
+                frame = self.queue.get()
+
+                if frame is None:
+                    break
+
+                self._write(frame)
+
+                if self.queue.empty():
+                    # Keep files on disk readable while recording goes on.
+                    self.dataFile.flush()
+                    self.indexFile.flush()
+
+        except (IOError, OSError) as msg:
+            print("Live view recording to %s failed: %s" % (self.path, msg))
+            self.closed = True
+
+        finally:
+            self.dataFile.close()
+            self.indexFile.close()
+
+    def _write(self, frame):
+        self.dataFile.write(frame.data)
+
+        # Index record only after its data, a reader never sees a record pointing past the end of the data.
+        self.indexFile.write(INDEX_RECORD.pack(self.numBytes, len(frame.data), frame.sequence, frame.timestamp, frame.receivedAt))
+
+        self.numFrames += 1
+        self.numBytes += len(frame.data)
+
+
+class LiveViewRecording(object):
+    """Reads a recording made by LiveViewRecorder.
+
+    len() is the number of frames, recording[i] is frame i as a LiveViewFrame.  receivedAt of the frames is
+    time.monotonic() of the recording session, seek() converts seconds from the start to a frame number."""
+
+    def __init__(self, path):
+        self.path = path
+        self.dataFile = open(path, 'rb')
+        self.indexFile = open(indexPath(path), 'rb')
+
+        if self.indexFile.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+            self.close()
+            raise ValueError("%s is not a live view recording index" % indexPath(path))
+
+        # A recording cut short may end in a partial record, leave it out.
+        size = os.fstat(self.indexFile.fileno()).st_size - len(INDEX_MAGIC)
+        self.numFrames = size // INDEX_RECORD.size
+
+        self.startTime = self.record(0)[4] if self.numFrames else 0.0
+
+    def __len__(self):
+        return self.numFrames
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.numFrames
+
+        if not 0 <= index < self.numFrames:
+            raise IndexError("Frame %d not in recording" % index)
+
+        offset, length, sequence, timestamp, receivedAt = self.record(index)
+
+        self.dataFile.seek(offset)
+        data = self.dataFile.read(length)
+
+        return LiveViewFrame(data, sequence, timestamp, receivedAt)
+
+    def record(self, index):
+        """Index record of frame index: (offset, length, sequence, timestamp, receivedAt)."""
+        self.indexFile.seek(len(INDEX_MAGIC) + index * INDEX_RECORD.size)
+
+        return INDEX_RECORD.unpack(self.indexFile.read(INDEX_RECORD.size))
+
+    def duration(self):
+        """Seconds from the first to the last frame."""
+        if not self.numFrames:
+            return 0.0
+
+        return self.record(self.numFrames - 1)[4] - self.startTime
+
+    def seek(self, seconds):
+        """Number of the first frame at or after seconds from the start of the recording."""
+        index = bisect_left(_ArrivalTimes(self), self.startTime + seconds)
+
+        return min(index, self.numFrames - 1) if self.numFrames else 0
+
+    def close(self):
+        self.dataFile.close()
+        self.indexFile.close()
+
+
+class _ArrivalTimes(object):
+    """Arrival times of a recording's frames as a sequence, for bisect."""
+
+    def __init__(self, recording):
+        self.recording = recording
+
+    def __len__(self):
+        return len(self.recording)
+
+    def __getitem__(self, index):
+        return self.recording.record(index)[4]
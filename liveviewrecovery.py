@@ -0,0 +1,78 @@
+import random
+import threading
+import time
+
+
+class LiveViewRecovery(threading.Thread):
+    """Brings a failed live view stream back, in the background, without a full reconnect.
+
+    A short Wi-Fi dropout usually leaves the camera's live view server running, so the first reopenAttempts tries
+    just reopen the live view URL already known, which costs no camera command.  Only after that is live view
+    started again with a startLiveview command, which may hand out a new URL.  Attempts are spaced by exponential
+    backoff with jitter, the first one is made at once.
+
+    reopen(recovery) and restart(recovery) make one attempt each and return True once frames flow again.  Then
+    recoveredCallback(recovery, seconds, attempts) is called with the time taken to recover; if live view is
+    still down after GIVE_UP_AFTER seconds failedCallback(recovery) is called instead.  All in this thread."""
+
+    REOPEN_ATTEMPTS = 3
+    INITIAL_BACKOFF = 0.05
+    MAX_BACKOFF     = 2.0
+    GIVE_UP_AFTER   = 30.0
+
+    def __init__(self, reopen, restart, recoveredCallback=None, failedCallback=None, reopenAttempts=REOPEN_ATTEMPTS):
+        super(LiveViewRecovery, self).__init__(name='LiveViewRecovery')
+        self.daemon = True
+
+        self.reopen = reopen
+        self.restart = restart
+        self.recoveredCallback = recoveredCallback
+        self.failedCallback = failedCallback
+        self.reopenAttempts = reopenAttempts
+
+        self.stopEvent = threading.Event()
+        self.startTime = time.monotonic()
+        self.attempts = 0
+
+    def backoff(self, attempt):
+        """Seconds to wait before attempt, counted from 0.  Half the exponential delay is fixed, half random."""
+        if attempt == 0:
+            return 0.0
+
+        delay = min(LiveViewRecovery.MAX_BACKOFF, LiveViewRecovery.INITIAL_BACKOFF * 2 ** (attempt - 1))
+
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def run(self):
+        while not self.stopEvent.wait(self.backoff(self.attempts)):
+            if time.monotonic() - self.startTime > LiveViewRecovery.GIVE_UP_AFTER:
+                print("Live view not recovered after %d attempts, giving up" % self.attempts)
+
+                if self.failedCallback:
+                    self.failedCallback(self)
+
+                return
+
+            if self.attempts < self.reopenAttempts:
+                recovered = self.reopen(self)
+
+            else:
+                recovered = self.restart(self)
+
+            self.attempts += 1
+
+            if recovered and not self.stopped():
+                seconds = time.monotonic() - self.startTime
+                print("Live view recovered in %.0f ms, %d attempts" % (1000 * seconds, self.attempts))
+
+                if self.recoveredCallback:
+                    self.recoveredCallback(self, seconds, self.attempts)
+
+                return
+
+    def stop(self):
+        """Ask the thread to quit, an attempt in progress is finished first."""
+        self.stopEvent.set()
+
+    def stopped(self):
+        return self.stopEvent.is_set()
@@ -0,0 +1,165 @@
+import threading
+import time
+
+
+class LiveViewSizeController(object):
+    """Picks the live view size, 'M' or 'L', from the throughput live view actually achieves.
+
+    Fed a LiveViewStats snapshot every stats interval.  Steps down when the frame rate falls below DOWN_RATIO of the
+    best seen, or more than DROP_RATIO of frames are dropped, in DOWN_INTERVALS snapshots in a row.  Steps up only
+    after upIntervals snapshots in a row at UP_RATIO of the best frame rate with hardly any drops.
+
+    That gap is the hysteresis, and it grows: each time the larger size fails again within PROBE_WINDOW seconds of
+    stepping up, upIntervals doubles, up to MAX_UP_INTERVALS, so a link that cannot carry it is not probed over and
+    over.  Once the larger size held for PROBE_WINDOW it is back to UP_INTERVALS.  Snapshots taken within
+    SETTLE_INTERVALS after a switch still mix both sizes and are ignored.
+
+    update() only proposes a switch; the size changes once switchDone() reports the stream at the new size running.
+    Until then snapshots are ignored.
+
+    The best frame rate is forgotten on reset() and otherwise decays by BEST_DECAY every snapshot, so a camera or
+    scene that can no longer reach an old best does not keep live view small for good."""
+
+    # Smallest first.  Plain startLiveview gives the camera's default, M.
+    SIZES = ['M', 'L']
+
+    DOWN_RATIO       = 0.75
+    UP_RATIO         = 0.9
+    DROP_RATIO       = 0.1
+    DOWN_INTERVALS   = 2
+    UP_INTERVALS     = 5
+    MAX_UP_INTERVALS = 120
+    SETTLE_INTERVALS = 3
+    PROBE_WINDOW     = 30.0
+    BEST_DECAY       = 0.995
+
+    def __init__(self, size='M'):
+        self.enabled = True
+
+        self.lock = threading.Lock()
+        self.bestFps = 0.0
+        self.upIntervals = LiveViewSizeController.UP_INTERVALS
+        self.lastStepUp = None
+        self.numSwitches = 0
+
+        self.size = size
+        self.pending = None
+        self.settle = LiveViewSizeController.SETTLE_INTERVALS
+        self.numGood = 0
+        self.numBad = 0
+        self.lastReceived = 0
+        self.lastDropped = 0
+
+    def reset(self, size='M'):
+        """Live view was (re)started at size, start measuring afresh."""
+        with self.lock:
+            self.bestFps = 0.0
+            self.pending = None
+            self._switched(size)
+
+    def switchDone(self, size, succeeded, now=None):
+        """Report the outcome of switching live view to size.  Only a switch that succeeded changes the size; a
+        failed step up counts as a failed probe of the larger size."""
+        if now is None:
+            now = time.monotonic()
+
+        with self.lock:
+            proposed = size == self.pending
+
+            if proposed:
+                self.pending = None
+
+            index = LiveViewSizeController.SIZES.index(self.size)
+            newIndex = LiveViewSizeController.SIZES.index(size)
+
+            if succeeded:
+                self.lastStepUp = now if newIndex > index else None
+                self._switched(size)
+
+            elif proposed:
+                if newIndex > index:
+                    self.upIntervals = min(LiveViewSizeController.MAX_UP_INTERVALS, 2 * self.upIntervals)
+
+                # Measure the size still running afresh.
+                self._switched(self.size)
+
+    def update(self, snapshot, now=None):
+        """Feed a LiveViewStats snapshot.  Returns the size to switch to, or None to stay."""
+        if now is None:
+            now = time.monotonic()
+
+        with self.lock:
+            received = snapshot['framesReceived'] - self.lastReceived
+            dropped = snapshot['framesDropped'] - self.lastDropped
+            self.lastReceived = snapshot['framesReceived']
+            self.lastDropped = snapshot['framesDropped']
+
+            if self.pending is not None:
+                return None
+
+            if self.settle > 0:
+                self.settle -= 1
+                return None
+
+            if not self.enabled:
+                return None
+
+            fps = snapshot['fps']
+            self.bestFps = max(self.bestFps * LiveViewSizeController.BEST_DECAY, fps)
+
+            # Counters go back to 0 when the stats are reset.
+            total = max(0, received) + max(0, dropped)
+            dropRatio = max(0, dropped) / float(total) if total else 0.0
+
+            if fps < LiveViewSizeController.DOWN_RATIO * self.bestFps or dropRatio > LiveViewSizeController.DROP_RATIO:
+                self.numBad += 1
+                self.numGood = 0
+
+            elif fps >= LiveViewSizeController.UP_RATIO * self.bestFps and dropRatio <= LiveViewSizeController.DROP_RATIO / 4:
+                self.numGood += 1
+                self.numBad = 0
+
+            else:
+                self.numGood = 0
+                self.numBad = 0
+
+            index = LiveViewSizeController.SIZES.index(self.size)
+            recentlyUp = self.lastStepUp is not None and now - self.lastStepUp < LiveViewSizeController.PROBE_WINDOW
+
+            if self.numBad >= LiveViewSizeController.DOWN_INTERVALS and index > 0:
+                if recentlyUp:
+                    self.upIntervals = min(LiveViewSizeController.MAX_UP_INTERVALS, 2 * self.upIntervals)
+
+                self.lastStepUp = None
+
+                return self._propose(LiveViewSizeController.SIZES[index - 1])
+
+            if self.numGood >= self.upIntervals and index < len(LiveViewSizeController.SIZES) - 1:
+                return self._propose(LiveViewSizeController.SIZES[index + 1])
+
+            if self.lastStepUp is not None and not recentlyUp:
+                # Larger size held, the link can carry it.
+                self.upIntervals = LiveViewSizeController.UP_INTERVALS
+                self.lastStepUp = None
+
+            return None
+
+    def _propose(self, size):
+        """Call with lock held."""
+        self.pending = size
+        self.numGood = 0
+        self.numBad = 0
+
+        return size
+
+    def _switched(self, size):
+        """Call with lock held."""
+        if size != self.size:
+            self.numSwitches += 1
+
+        self.size = size
+        self.settle = LiveViewSizeController.SETTLE_INTERVALS
+        self.numGood = 0
+        self.numBad = 0
+
+        return size
@@ -0,0 +1,138 @@
+import socket
+import struct
+import threading
+
+from collections import namedtuple
+
+from recvbuffer import RecvBuffer
+
+
+NUM_LIVEVIEW_HEADER_BYTES          = 8
+NUM_LIVEVIEW_PAYLOAD_HEADER_BYTES  = 128
+PAYLOAD_SIZE_INDEX                 = 4
+PADDING_SIZE_INDEX                 = 7
+
+
+# A live view JPEG with the camera's sequence number and timestamp (ms) from its common header, and the
+# time.monotonic() it arrived at.
+LiveViewFrame = namedtuple('LiveViewFrame', ['data', 'sequence', 'timestamp', 'receivedAt'])
+
+
+def parseLiveViewHeaders(commonHeader, payloadHeader):
+    """Check live view frame headers are sensible.  Returns the JPEG payload size, 0 if headers are corrupted."""
+    if len(commonHeader) == NUM_LIVEVIEW_HEADER_BYTES and \
+       commonHeader[0] == 0xFF and \
+       commonHeader[1] == 0x01 and \
+       len(payloadHeader) == NUM_LIVEVIEW_PAYLOAD_HEADER_BYTES and \
+       payloadHeader[0] == 0x24 and \
+       payloadHeader[1] == 0x35 and \
+       payloadHeader[2] == 0x68 and \
+       payloadHeader[3] == 0x79:
+        # Compute payload length from 3 byte field..
+        totalNumBytesToGet = payloadHeader[PAYLOAD_SIZE_INDEX] * 256 * 256 + \
+                             payloadHeader[PAYLOAD_SIZE_INDEX+1] * 256 + \
+                             payloadHeader[PAYLOAD_SIZE_INDEX+2]
+
+    else:
+        totalNumBytesToGet = 0
+        print("Header parse error")
+
+    return totalNumBytesToGet
+
+
+def parseFrameInfo(commonHeader):
+    """Returns (sequence number, timestamp in ms) from a common header."""
+    return struct.unpack_from('>HI', commonHeader, 2)
+
+
+class LiveViewStream(threading.Thread):
+    """Producer thread that keeps reading frames from an open live view socket.
+
+    Runs independently of the camera command thread, so slow commands and photo downloads do not stall the
+    viewfinder.  frameCallback gets a memoryview of every JPEG, valid until it returns.  errorCallback is called
+    once, with this stream, if the socket fails; the thread then exits.
+
+    If stats, a LiveViewStats, is given it is fed with every frame's sequence number, timestamp and size."""
+
+    def __init__(self, sock, frameCallback, errorCallback, stats=None):
+        super(LiveViewStream, self).__init__(name='LiveViewStream')
+        self.daemon = True
+
+        self.sock = sock
+        self.frameCallback = frameCallback
+        self.errorCallback = errorCallback
+        self.stats = stats
+        self.buffer = RecvBuffer()
+        self.stopped = False
+
+        # Sequence number and timestamp of the frame last read.
+        self.sequence = None
+        self.timestamp = None
+
+    def run(self):
+        while not self.stopped:
+            frame = self.readFrame()
+
+            if self.stopped:
+                break
+
+            if frame is None:
+                self.errorCallback(self)
+                break
+
+            if self.stats:
+                self.stats.frameReceived(self.sequence, self.timestamp, len(frame))
+
+            try:
+                self.frameCallback(frame, self.sequence, self.timestamp)
+
+            except Exception as msg:
+                # Handled like a read error, so live view is recovered or restarted rather than left frozen.
+                print("ERROR: Live view frame handling failed: %s" % msg)
+
+                if not self.stopped:
+                    self.errorCallback(self)
+
+                break
+
+        self.sock.close()
+
+    def stop(self):
+        """Ask the thread to quit.  Unblocks a pending read by shutting the socket down."""
+        self.stopped = True
+
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+
+        except socket.error:
+            pass
+
+    def readFrame(self):
+        """Read the next live view frame.  Returns a memoryview of the JPEG data, valid until the next call, or None on error.
+
+        The frame's sequence number and timestamp are left in self.sequence and self.timestamp."""
+        numHeaderBytes = NUM_LIVEVIEW_HEADER_BYTES + NUM_LIVEVIEW_PAYLOAD_HEADER_BYTES
+
+        # Common header and payload header arrive back to back, get both in one go.
+        headers = self.buffer.fill(self.sock, numHeaderBytes)
+
+        if headers is None:
+            return None
+
+        # Returns 0 if headers are corrupted.
+        totalNumBytesToGet = parseLiveViewHeaders(headers[:NUM_LIVEVIEW_HEADER_BYTES], headers[NUM_LIVEVIEW_HEADER_BYTES:])
+
+        if not totalNumBytesToGet:
+            return None
+
+        self.sequence, self.timestamp = parseFrameInfo(headers)
+        numPaddingBytes = headers[NUM_LIVEVIEW_HEADER_BYTES + PADDING_SIZE_INDEX]
+
+        # Payload goes right after the headers so they stay available alongside the frame.
+        payload = self.buffer.fill(self.sock, totalNumBytesToGet + numPaddingBytes, offset=numHeaderBytes)
+
+        if payload is None:
+            return None
+
+        # Padding follows the JPEG data, it is read to stay in step with the stream but not passed on.
+        return payload[:totalNumBytesToGet]
@@ -0,0 +1,203 @@
+import asyncio
+import socket
+import threading
+
+
+class MjpegServer(threading.Thread):
+    """Local HTTP server that re-serves live view frames to any number of clients.
+
+    The camera allows a single live view consumer, this lets browsers, OpenCV and other tools watch the frames we
+    already receive.  GET /  streams multipart/x-mixed-replace, GET /snapshot.jpg returns the newest frame.
+
+    Everything runs on one asyncio event loop in this thread.  Each client has its own small queue: a client that
+    reads slower than the camera sends loses its oldest queued frames, it never holds up the others or publish()."""
+
+    DEFAULT_PORT      = 8080
+    BOUNDARY          = b'frame'
+    REQUEST_TIMEOUT   = 10.0
+    WRITE_BUFFER_SIZE = 256 * 1024
+
+    def __init__(self, host='0.0.0.0', port=DEFAULT_PORT, maxQueued=2):
+        super(MjpegServer, self).__init__(name='MjpegServer')
+        self.daemon = True
+
+        self.host = host
+        self.port = port
+        self.maxQueued = maxQueued
+
+        self.loop = None
+        self.server = None
+        self.started = threading.Event()
+        self.error = None
+
+        # Only touched in the event loop.  clients maps each streaming client's frame queue to its writer.
+        self.clients = {}
+        self.handlers = set()
+        self.latest = None
+        self.framesSent = 0
+        self.framesDropped = 0
+
+    def start(self):
+        """Start serving.  Raises OSError if the port cannot be opened."""
+        super(MjpegServer, self).start()
+        self.started.wait()
+
+        if self.error:
+            raise self.error
+
+    def run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        try:
+            self.server = self.loop.run_until_complete(asyncio.start_server(self._handleClient, self.host, self.port))
+
+        except OSError as msg:
+            self.error = msg
+            self.started.set()
+            self.loop.close()
+            return
+
+        # Port 0 picks a free port, report the real one.
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.started.set()
+
+        try:
+            self.loop.run_forever()
+
+        finally:
+            self.loop.close()
+
+    def stop(self):
+        if self.loop and self.is_alive():
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop)
+            self.join()
+
+    async def _shutdown(self):
+        self.server.close()
+
+        for queue, writer in self.clients.items():
+            # Wake streaming clients up, and make a drain() on a stuck client fail.
+            self._clearQueue(queue)
+            queue.put_nowait(None)
+            writer.transport.abort()
+
+        if self.handlers:
+            await asyncio.wait(self.handlers, timeout=MjpegServer.REQUEST_TIMEOUT)
+
+        self.loop.stop()
+
+    def publish(self, frame):
+        """Hand a LiveViewFrame to all clients, from any thread."""
+        loop = self.loop
+
+        if loop and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(self._publish, frame.data)
+
+            except RuntimeError:
+                # Loop closed meanwhile.
+                pass
+
+    def numClients(self):
+        return len(self.clients)
+
+    def _publish(self, data):
+        self.latest = data
+
+        for queue in self.clients:
+            if queue.full():
+                # Slow client, throw away its oldest frame.
+                queue.get_nowait()
+                self.framesDropped += 1
+
+            queue.put_nowait(data)
+
+    def _clearQueue(self, queue):
+        while not queue.empty():
+            queue.get_nowait()
+
+    async def _handleClient(self, reader, writer):
+        task = asyncio.current_task()
+        self.handlers.add(task)
+
+        try:
+            await self._serveClient(reader, writer)
+
+        finally:
+            self.handlers.discard(task)
+
+    async def _serveClient(self, reader, writer):
+        sock = writer.get_extra_info('socket')
+
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        writer.transport.set_write_buffer_limits(high=MjpegServer.WRITE_BUFFER_SIZE)
+
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), MjpegServer.REQUEST_TIMEOUT)
+            fields = request.split(b'\r\n', 1)[0].split()
+
+            if len(fields) < 2 or fields[0] != b'GET':
+                writer.write(b'HTTP/1.0 405 Method Not Allowed\r\nConnection: close\r\n\r\n')
+
+            elif fields[1].split(b'?')[0] == b'/snapshot.jpg':
+                await self._sendSnapshot(writer)
+
+            elif fields[1].split(b'?')[0] in (b'/', b'/stream', b'/stream.mjpg'):
+                await self._sendStream(writer)
+
+            else:
+                writer.write(b'HTTP/1.0 404 Not Found\r\nConnection: close\r\n\r\n')
+
+            await writer.drain()
+
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError, OSError):
+            pass
+
+        finally:
+            writer.close()
+
+    async def _sendSnapshot(self, writer):
+        if self.latest is None:
+            writer.write(b'HTTP/1.0 503 Service Unavailable\r\nConnection: close\r\n\r\n')
+            return
+
+        writer.writelines([b'HTTP/1.0 200 OK\r\n'
+                           b'Content-Type: image/jpeg\r\n'
+                           b'Content-Length: %d\r\n'
+                           b'Cache-Control: no-cache\r\n'
+                           b'Connection: close\r\n\r\n' % len(self.latest),
+                           self.latest])
+
+    async def _sendStream(self, writer):
+        writer.write(b'HTTP/1.0 200 OK\r\n'
+                     b'Content-Type: multipart/x-mixed-replace; boundary=' + MjpegServer.BOUNDARY + b'\r\n'
+                     b'Cache-Control: no-cache\r\n'
+                     b'Connection: close\r\n\r\n')
+
+        queue = asyncio.Queue(self.maxQueued)
+        self.clients[queue] = writer
+
+        try:
+            while True:
+                data = await queue.get()
+
+                if data is None:
+                    # Server shutting down.
+                    break
+
+                # Part header, frame and trailer without joining them into a new buffer.
+                writer.writelines([b'--' + MjpegServer.BOUNDARY + b'\r\n'
+                                   b'Content-Type: image/jpeg\r\n'
+                                   b'Content-Length: %d\r\n\r\n' % len(data),
+                                   data,
+                                   b'\r\n'])
+
+                # Waits only while this client's socket buffer is full, frames meanwhile pile up in its own queue.
+                await writer.drain()
+                self.framesSent += 1
+
+        finally:
+            del self.clients[queue]
@@ -0,0 +1,130 @@
+import io
+import threading
+import time
+
+import numpy
+
+from PIL import Image
+
+from latestframe import LatestFrameSlot
+
+
+class MotionDetector(object):
+    """Motion score of live view frames from downscaled grayscale arrays.
+
+    Each frame is decoded straight to a small grayscale image (the JPEG decoder scales down while decoding), then
+    compared with the previous one by frame differencing and by histogram distance.  Both are computed per region of
+    interest; the score is that of the most active region, 0 (still) to 100.
+
+    Regions are (x, y, width, height) tuples in fractions of the frame, None means the whole frame."""
+
+    ANALYSIS_SIZE     = (160, 120)
+    PIXEL_THRESHOLD   = 25
+    HISTOGRAM_BINS    = 32
+
+    def __init__(self, regions=None, differenceWeight=0.7):
+        """differenceWeight is the share of frame differencing in the score, the rest is histogram distance."""
+        self.regions = regions or [(0.0, 0.0, 1.0, 1.0)]
+        self.differenceWeight = differenceWeight
+        self.previous = None
+        self.slices = None
+
+    def setRegions(self, regions):
+        self.regions = regions or [(0.0, 0.0, 1.0, 1.0)]
+        self.slices = None
+
+    def analyse(self, jpegData):
+        """Returns the motion score of jpegData relative to the frame analysed before, None for the first frame."""
+        gray = self._grayscale(jpegData)
+
+        previous, self.previous = self.previous, gray
+
+        if previous is None or previous.shape != gray.shape:
+            return None
+
+        if self.slices is None:
+            self.slices = [self._regionSlice(region, gray.shape) for region in self.regions]
+
+        changed = numpy.abs(gray - previous) > MotionDetector.PIXEL_THRESHOLD
+        shift = 8 - int(numpy.log2(MotionDetector.HISTOGRAM_BINS))
+
+        score = 0.0
+
+        for regionSlice in self.slices:
+            # Share of pixels that changed noticeably.
+            difference = changed[regionSlice].mean()
+
+            # Half the L1 distance of the normalised histograms, 0 for identical, 1 for disjoint.
+            h1 = numpy.bincount((gray[regionSlice] >> shift).ravel(), minlength=MotionDetector.HISTOGRAM_BINS)
+            h2 = numpy.bincount((previous[regionSlice] >> shift).ravel(), minlength=MotionDetector.HISTOGRAM_BINS)
+            distance = numpy.abs(h1 - h2).sum() / (2.0 * h1.sum())
+
+            score = max(score, self.differenceWeight * difference + (1.0 - self.differenceWeight) * distance)
+
+        return 100.0 * score
+
+    def _grayscale(self, jpegData):
+        image = Image.open(io.BytesIO(jpegData))
+
+        # Let the JPEG decoder produce a reduced size grayscale image directly, much cheaper than a full decode.
+        image.draft('L', MotionDetector.ANALYSIS_SIZE)
+        image = image.convert('L')
+
+        if image.size != MotionDetector.ANALYSIS_SIZE:
+            image = image.resize(MotionDetector.ANALYSIS_SIZE)
+
+        return numpy.asarray(image, dtype=numpy.int16)
+
+    def _regionSlice(self, region, shape):
+        x, y, w, h = region
+        rows, columns = shape
+
+        top = min(int(y * rows), rows - 1)
+        left = min(int(x * columns), columns - 1)
+
+        return (slice(top, max(top + 1, int((y + h) * rows))), slice(left, max(left + 1, int((x + w) * columns))))
+
+
+class MotionWorker(threading.Thread):
+    """Runs a MotionDetector on live view frames in its own thread.
+
+    Frames the detector has not got to yet are replaced by newer ones, so analysis never lags behind the stream.
+    scoreCallback(score, frame) is called in this thread for every analysed frame; analysisTime is the smoothed
+    time one analysis takes, in seconds."""
+
+    def __init__(self, scoreCallback, detector=None):
+        super(MotionWorker, self).__init__(name='MotionWorker')
+        self.daemon = True
+
+        self.scoreCallback = scoreCallback
+        self.detector = detector or MotionDetector()
+        self.frames = LatestFrameSlot()
+        self.analysisTime = 0.0
+
+    def submit(self, frame):
+        """Queue a LiveViewFrame for analysis."""
+        self.frames.put(frame)
+
+    def stop(self):
+        self.frames.close()
+
+    def run(self):
+        while True:
+            frame = self.frames.take()
+
+            if frame is None:
+                break
+
+            start = time.perf_counter()
+
+            try:
+                score = self.detector.analyse(frame.data)
+
+            except (IOError, ValueError) as msg:
+                print("Motion detection failed: %s" % msg)
+                continue
+
+            self.analysisTime += (time.perf_counter() - start - self.analysisTime) / 16.0
+
+            if score is not None:
+                self.scoreCallback(score, frame)
@@ -0,0 +1,120 @@
+import itertools
+import threading
+import time
+
+from collections import deque
+
+
+class MotionTrigger(object):
+    """Decides when motion scores should fire a capture.
+
+    Fires when the score reaches threshold, then stays quiet until the score has dropped to releaseThreshold
+    (hysteresis), so one passing object gives one shot rather than a shot per frame.  On top of that at least cooldown
+    seconds pass between captures, no more than maxCapturesPerMinute are fired, and nothing fires while the previous
+    capture has not reached the shutter yet.
+
+    fireCallback(token) is given a token for each capture it fires; shutterReleased() only counts when handed that
+    token, so a manual capture meanwhile neither clears the pending one nor skews the latency.
+
+    Trigger-to-shutter latency is measured from the arrival of the frame that showed the motion to shutterReleased()."""
+
+    PENDING_TIMEOUT = 30.0
+
+    def __init__(self, fireCallback, threshold=20.0, releaseThreshold=10.0, cooldown=2.0, maxCapturesPerMinute=10):
+        self.fireCallback = fireCallback
+        self.threshold = threshold
+        self.releaseThreshold = releaseThreshold
+        self.cooldown = cooldown
+        self.maxCapturesPerMinute = maxCapturesPerMinute
+        self.enabled = False
+
+        self.lock = threading.Lock()
+        self.armed = True
+        self.lastFire = None
+        self.fireTimes = deque()
+        self.pendingSince = None
+        self.pendingToken = None
+        self.tokens = itertools.count(1)
+        self.latencies = deque(maxlen=100)
+        self.numFired = 0
+        self.numSuppressed = 0
+
+    def update(self, score, frameTime=None):
+        """Feed a motion score, frameTime is time.monotonic() the frame arrived.  Returns True if a capture was fired."""
+        now = time.monotonic()
+
+        if frameTime is None:
+            frameTime = now
+
+        with self.lock:
+            if not self.armed:
+                if score <= self.releaseThreshold:
+                    self.armed = True
+
+                return False
+
+            if not self.enabled or score < self.threshold:
+                return False
+
+            if self.pendingSince is not None and now - self.pendingSince < MotionTrigger.PENDING_TIMEOUT:
+                # Previous capture still on its way, camera would refuse anyway.
+                self.numSuppressed += 1
+                return False
+
+            if self.lastFire is not None and now - self.lastFire < self.cooldown:
+                self.numSuppressed += 1
+                return False
+
+            while self.fireTimes and now - self.fireTimes[0] > 60.0:
+                self.fireTimes.popleft()
+
+            if len(self.fireTimes) >= self.maxCapturesPerMinute:
+                self.numSuppressed += 1
+                return False
+
+            self.armed = False
+            self.lastFire = now
+            self.fireTimes.append(now)
+            self.pendingSince = frameTime
+            self.pendingToken = token = next(self.tokens)
+            self.numFired += 1
+
+        self.fireCallback(token)
+
+        return True
+
+    def shutterReleased(self, token, when=None):
+        """Call when the camera confirmed the capture fired with token, or with when=None if it failed.  Returns the
+        latency or None.  Other tokens, e.g. None for a manual capture, are ignored."""
+        with self.lock:
+            if token is None or token != self.pendingToken:
+                return None
+
+            pendingSince, self.pendingSince = self.pendingSince, None
+            self.pendingToken = None
+
+            if pendingSince is None or when is None:
+                return None
+
+            latency = when - pendingSince
+            self.latencies.append(latency)
+
+            return latency
+
+    def stats(self):
+        with self.lock:
+            samples = sorted(self.latencies)
+
+            result = {
+                         'fired': self.numFired,
+                         'suppressed': self.numSuppressed,
+                     }
+
+            if samples:
+                result['lastLatency'] = self.latencies[-1]
+
+        if samples:
+            result['meanLatency'] = sum(samples) / len(samples)
+            result['p95Latency'] = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+        return result
@@ -0,0 +1,270 @@
+import argparse
+import http.client
+import itertools
+import os
+import socket
+import sys
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+import sonyprotocol
+
+from cameraclient import CameraClient
+from discovery import Discovery
+from photostorage import PhotoStorage
+from recvbuffer import RecvBuffer
+
+
+class _PreparedShot(object):
+    """A connected command socket with the actTakePicture request already built, ready to be triggered."""
+
+    def __init__(self, index, client, sock, request, requestId):
+        self.index = index
+        self.client = client
+        self.sock = sock
+        self.request = request
+        self.requestId = requestId
+        self.sendStart = None
+        self.sendEnd = None
+
+
+class MultiCameraController(object):
+    """Drives several cameras at once: discovers and connects them concurrently, multiplexes their live views
+    and takes a photo on all of them with as little trigger skew as possible.
+
+    frameCallback(index, frame) is called with each live view frame and the index of the camera it came from.
+    With directory set each camera's photos are saved in its own camera-NN subdirectory."""
+
+    CONNECT_TIMEOUT  = 5
+    RESPONSE_TIMEOUT = 10
+
+    SSDP_IP   = sonyprotocol.SSDP_IP
+    SSDP_PORT = sonyprotocol.SSDP_PORT
+
+    def __init__(self, frameCallback=None, directory=None):
+        self.frameCallback = frameCallback
+        self.directory = directory
+
+        self.clients = []
+        self.photoStorages = []
+        self.requestIds = itertools.count(1)
+
+        self.executor = None
+
+    def discover(self, window=3.0, retries=3, service=sonyprotocol.SERVICE):
+        """Search for cameras for the whole window.  Returns the SSDPInfo of every camera that answered."""
+        discovery = Discovery(service, self.SSDP_IP, self.SSDP_PORT, window, retries)
+        discovery.start()
+        discovery.join()
+
+        return list(discovery.responders)
+
+    def connect(self, responders=None, startLiveView=True, service=sonyprotocol.SERVICE):
+        """Connect to all responders, discovering them first if not given, concurrently.  Returns the number connected.
+
+        Cameras failing to connect are left out, indexes count the connected cameras only."""
+        self.close()
+
+        if responders is None:
+            responders = self.discover(service=service)
+
+        if not responders:
+            return 0
+
+        self.executor = ThreadPoolExecutor(max_workers=len(responders), thread_name_prefix='MultiCamera')
+
+        candidates = [CameraClient() for SSDPInfo in responders]
+        futures = [self.executor.submit(client.connect, service, False, SSDPInfo) for client, SSDPInfo in zip(candidates, responders)]
+
+        for client, future in zip(candidates, futures):
+            if future.result():
+                self.clients.append(client)
+
+            else:
+                print("ERROR: Unable to connect to camera at %s" % client.SSDPInfo.get('location'))
+                client.close()
+
+        for index, client in enumerate(self.clients):
+            if self.frameCallback:
+                client.frameCallback = lambda frame, index=index: self.frameCallback(index, frame)
+
+            if self.directory:
+                cameraDirectory = os.path.join(self.directory, 'camera-%02d' % (index + 1))
+
+                if not os.path.isdir(cameraDirectory):
+                    os.makedirs(cameraDirectory)
+
+                photoStorage = PhotoStorage(cameraDirectory, numWorkers=1)
+                self.photoStorages.append(photoStorage)
+                client.photoStorage = photoStorage
+
+        if startLiveView:
+            self.startLiveView()
+
+        return len(self.clients)
+
+    def close(self):
+        for client in self.clients:
+            client.close()
+
+        for photoStorage in self.photoStorages:
+            photoStorage.close()
+
+        if self.executor:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+        self.clients = []
+        self.photoStorages = []
+
+    def startLiveView(self):
+        """Start live view on all cameras concurrently.  Returns True if all of them started."""
+        return all(list(self.executor.map(lambda client: client.startLiveView(), self.clients)))
+
+    def stopLiveView(self):
+        list(self.executor.map(lambda client: client.stopLiveView(), self.clients))
+
+    def takePictures(self, progress=None):
+        """Take a photo on every camera at the same moment and download them all in parallel.
+
+        Everything that can be done ahead of time is, concurrently: waiting for the cameras to be idle, connecting
+        a fresh command socket to each and building its request.  The requests are then sent back to back from a
+        single loop, so the trigger skew is only the time for a few send() calls.
+
+        Returns a dict with photos (path, JPEG data or None per camera), sendTimes (perf_counter() each request
+        was handed to the network, relative to the first), triggerSkew (first to last send), responseSkew (first
+        to last camera confirming the capture) and elapsed (the whole operation, including downloads), in seconds."""
+        start = time.perf_counter()
+
+        shots = list(self.executor.map(self._prepareShot, range(len(self.clients)), self.clients))
+        ready = [shot for shot in shots if shot]
+
+        # The trigger: nothing but send() between the first and the last camera.
+        for shot in ready:
+            shot.sendStart = time.perf_counter()
+
+            try:
+                shot.sock.sendall(shot.request)
+
+            except socket.error as msg:
+                print("ERROR: Trigger of camera %d failed: %s" % (shot.index + 1, msg))
+
+            shot.sendEnd = time.perf_counter()
+
+        photos = [None] * len(self.clients)
+        confirmed = {}
+
+        def finishShot(shot):
+            snapShot, confirmedAt = self._readShotResponse(shot)
+            confirmed[shot.index] = confirmedAt
+
+            if snapShot:
+                photos[shot.index] = self._downloadShot(shot.client, snapShot, progress and (lambda received, total: progress(shot.index, received, total)))
+
+        list(self.executor.map(finishShot, ready))
+
+        sent = [shot for shot in ready if shot.sendEnd is not None]
+        confirmedTimes = [when for when in confirmed.values() if when is not None]
+        firstSend = sent[0].sendStart if sent else None
+
+        return {
+                   'photos': photos,
+                   'sendTimes': [shot.sendEnd - firstSend for shot in sent],
+                   'triggerSkew': sent[-1].sendEnd - firstSend if sent else None,
+                   'responseSkew': max(confirmedTimes) - min(confirmedTimes) if confirmedTimes else None,
+                   'elapsed': time.perf_counter() - start,
+               }
+
+    def _prepareShot(self, index, client):
+        if not client.waitForIdle():
+            print("ERROR: Camera %d not in IDLE state, current state: %s" % (index + 1, client.cameraState.cameraStatus))
+            return None
+
+        # A socket of its own, the connection pool may be busy with commands of other threads.
+        try:
+            sock = socket.create_connection((client.cameraCommandHost, client.cameraCommandPort), MultiCameraController.CONNECT_TIMEOUT)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.settimeout(MultiCameraController.RESPONSE_TIMEOUT)
+
+        except socket.error as msg:
+            print("ERROR: Unable to connect to camera %d: %s" % (index + 1, msg))
+            return None
+
+        requestId = next(self.requestIds)
+        request = sonyprotocol.cameraCommandRequest(client.cameraUrl.path, client.cameraUrl.netloc, 'actTakePicture', [], requestId)
+
+        return _PreparedShot(index, client, sock, request, requestId)
+
+    def _readShotResponse(self, shot):
+        """Returns the actTakePicture result, or None, and the perf_counter() it arrived."""
+        snapShot = None
+        confirmedAt = None
+
+        try:
+            response = http.client.HTTPResponse(shot.sock)
+            response.begin()
+            body = response.read()
+            confirmedAt = time.perf_counter()
+
+            snapShot = sonyprotocol.parseCommandResponse('actTakePicture', [], body, shot.requestId)
+
+        except (socket.error, http.client.HTTPException, ValueError) as msg:
+            print("ERROR: No capture response from camera %d: %s" % (shot.index + 1, msg))
+
+        finally:
+            shot.sock.close()
+
+        return snapShot, confirmedAt
+
+    def _downloadShot(self, client, snapShot, progress):
+        if not client.waitForIdle():
+            print("ERROR: Camera did not return to IDLE state after taking picture")
+            return None
+
+        # Downloads run in parallel, each needs its own buffer.
+        if client.photoStorage:
+            return client.downloadPhotoToFile(snapShot[0][0], RecvBuffer(), progress)
+
+        return client.downloadPhoto(snapShot[0][0], RecvBuffer(), progress)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Take photos on all cameras found at the same moment.")
+    parser.add_argument('--dir', default='DCIM', help="directory the per camera photo directories are in (default: %(default)s)")
+    parser.add_argument('--count', '-n', type=int, default=1, help="number of photos per camera (default: %(default)s)")
+    parser.add_argument('--window', type=float, default=3.0, help="seconds to search for cameras (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    controller = MultiCameraController(directory=args.dir)
+
+    try:
+        numCameras = controller.connect(controller.discover(args.window), startLiveView=False)
+
+        if not numCameras:
+            print("ERROR: No cameras found")
+            return 1
+
+        print("%d cameras" % numCameras)
+
+        for shot in range(args.count):
+            result = controller.takePictures()
+
+            for index, photo in enumerate(result['photos']):
+                print("camera %d: %s" % (index + 1, photo if isinstance(photo, str) else "failed"))
+
+            print("trigger skew %.3f ms, response skew %.3f ms, %.3f s including downloads" %
+                  (1000 * (result['triggerSkew'] or 0), 1000 * (result['responseSkew'] or 0), result['elapsed']))
+
+            if None in result['photos']:
+                return 1
+
+        return 0
+
+    finally:
+        controller.close()
+
+
+#Run this as a script if running stand alone
+if __name__=="__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,194 @@
+import itertools
+import os
+import threading
+import time
+
+from queue import Queue, Full
+
+
+class PhotoStorage(object):
+    """Write-behind photo storage.
+
+    submit() queues image data and returns at once, a pool of worker threads writes it to disk.  The queue is
+    bounded: when it is full submit() either waits (block=True) or drops the photo and reports the error.
+
+    Durability decides when data is forced to disk:
+        'none'   leave it to the OS,
+        'file'   fsync every file before it is reported as saved,
+        'batch'  fsync files in groups of batchSize, or when the queue runs empty.
+
+    File names are the capture time plus a sequence number, created exclusively so two photos never share a name."""
+
+    DURABILITY_NONE  = 'none'
+    DURABILITY_FILE  = 'file'
+    DURABILITY_BATCH = 'batch'
+
+    def __init__(self, directory, numWorkers=2, maxQueued=16, durability=DURABILITY_NONE, batchSize=8,
+                 savedCallback=None, errorCallback=None):
+        """savedCallback(path) and errorCallback(message) are called from worker threads."""
+        if durability not in (PhotoStorage.DURABILITY_NONE, PhotoStorage.DURABILITY_FILE, PhotoStorage.DURABILITY_BATCH):
+            raise ValueError("Unknown durability: %s" % durability)
+
+        self.directory = directory
+        self.durability = durability
+        self.batchSize = batchSize
+        self.savedCallback = savedCallback
+        self.errorCallback = errorCallback
+
+        self.queue = Queue(maxQueued)
+        self.sequenceNumbers = itertools.count(1)
+        self.lock = threading.Lock()
+        self.pendingSync = []
+
+        self.workers = []
+
+        for i in range(numWorkers):
+            worker = threading.Thread(target=self._workerLoop, name='PhotoStorage-%d' % i)
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
+
+    def submit(self, imageData, block=False, timeout=None, suffix='.jpg'):
+        """Queue imageData for writing.  Returns False, and reports an error, if the queue is full."""
+        try:
+            self.queue.put((imageData, suffix), block, timeout)
+
+        except Full:
+            self._reportError("Photo storage queue full, photo dropped")
+            return False
+
+        return True
+
+    def reservePath(self, suffix='.jpg', prefix=''):
+        """Create a new, empty, uniquely named file and return its path."""
+        while True:
+            name = '%s%s-%06d%s' % (prefix, time.strftime('%Y%m%d-%H%M%S'), next(self.sequenceNumbers), suffix)
+            path = os.path.join(self.directory, name)
+
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+
+            except FileExistsError:
+                # Left over from an earlier session in the same second, try next number.
+                continue
+
+            os.close(fd)
+
+            return path
+
+    def commitFile(self, tempPath, suffix='.jpg'):
+        """Move a completely written file, e.g. a streamed download, into storage.  Returns its final path."""
+        if self.durability == PhotoStorage.DURABILITY_FILE:
+            self._fsync(tempPath)
+
+        path = self.reservePath(suffix)
+        os.replace(tempPath, path)
+
+        self._synced(path)
+
+        if self.durability == PhotoStorage.DURABILITY_BATCH and self.queue.empty():
+            # No queued photo left whose write would sync the batch, do it now.
+            self._syncBatch()
+
+        return path
+
+    def flush(self):
+        """Wait until every queued photo is written and synced as durability requires."""
+        self.queue.join()
+        self._syncBatch()
+
+    def close(self):
+        self.flush()
+
+        for worker in self.workers:
+            self.queue.put(None)
+
+        for worker in self.workers:
+            worker.join()
+
+    def _workerLoop(self):
+        while True:
+            item = self.queue.get()
+
+            try:
+                if item is None:
+                    break
+
+                imageData, suffix = item
+                self._write(imageData, suffix)
+
+                if self.queue.empty():
+                    # Nothing else to do, good moment to make the batch durable.
+                    self._syncBatch()
+
+            finally:
+                self.queue.task_done()
+
+    def _write(self, imageData, suffix):
+        try:
+            path = self.reservePath(suffix)
+
+            with open(path, 'wb') as f:
+                f.write(imageData)
+
+                if self.durability == PhotoStorage.DURABILITY_FILE:
+                    f.flush()
+                    os.fsync(f.fileno())
+
+        except OSError as msg:
+            self._reportError("Unable to save photo in %s: %s" % (self.directory, msg))
+            return
+
+        self._synced(path)
+
+    def _fsync(self, path):
+        fd = os.open(path, os.O_RDONLY)
+
+        try:
+            os.fsync(fd)
+
+        finally:
+            os.close(fd)
+
+    def _synced(self, path):
+        """path is written, report it now or once its batch has been synced."""
+        if self.durability != PhotoStorage.DURABILITY_BATCH:
+            if self.savedCallback:
+                self.savedCallback(path)
+
+            return
+
+        with self.lock:
+            self.pendingSync.append(path)
+            batchFull = len(self.pendingSync) >= self.batchSize
+
+        if batchFull:
+            self._syncBatch()
+
+    def _syncBatch(self):
+        with self.lock:
+            paths, self.pendingSync = self.pendingSync, []
+
+        if not paths:
+            return
+
+        try:
+            for path in paths:
+                self._fsync(path)
+
+            # Make the new directory entries durable too.
+            self._fsync(self.directory)
+
+        except OSError as msg:
+            self._reportError("Unable to sync photos in %s: %s" % (self.directory, msg))
+            return
+
+        if self.savedCallback:
+            for path in paths:
+                self.savedCallback(path)
+
+    def _reportError(self, message):
+        print(message)
+
+        if self.errorCallback:
+            self.errorCallback(message)
@@ -0,0 +1,630 @@
+"""Stand-in for a Sony DSC-QX10, for testing and benchmarking without the camera.
+
+Answers SSDP M-SEARCH, serves the device description, the camera JSON-RPC API, postview images and a framed live
+view stream.  Frame rate, latency, jitter, loss and payload sizes are configurable, and all randomness comes from a
+seeded generator so a run can be reproduced:
+
+    python ./qx10sim.py --fps 30 --latency 0.05 --loss 0.01 --seed 1
+
+Clients on the same host find it with SSDP sent to 127.0.0.1, e.g. CameraClient with SSDP_IP set to '127.0.0.1'.
+"""
+
+import argparse
+import base64
+import itertools
+import json
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import sonyprotocol
+
+
+# 64x48 grayscale JPEG, padded to the configured sizes with comment segments.
+BASE_JPEG = base64.b64decode(
+    '/9j/4AAQSkZJRgABAQAAAQABAAD/2wBDABQODxIPDRQSEBIXFRQYHjIhHhwcHj0sLiQySUBMS0dARkVQWnNiUFVtVkVGZIhlbXd7'
+    'gYKBTmCNl4x9lnN+gXz/wAALCAAwAEABAREA/8QAHwAAAQUBAQEBAQEAAAAAAAAAAAECAwQFBgcICQoL/8QAtRAAAgEDAwIEAwUF'
+    'BAQAAAF9AQIDAAQRBRIhMUEGE1FhByJxFDKBkaEII0KxwRVS0fAkM2JyggkKFhcYGRolJicoKSo0NTY3ODk6Q0RFRkdISUpTVFVW'
+    'V1hZWmNkZWZnaGlqc3R1dnd4eXqDhIWGh4iJipKTlJWWl5iZmqKjpKWmp6ipqrKztLW2t7i5usLDxMXGx8jJytLT1NXW19jZ2uHi'
+    '4+Tl5ufo6erx8vP09fb3+Pn6/9oACAEBAAA/AKVFFFFFFFFdlRXJ3n/H5P8A9dG/nUNFFFFdlRXJ3n/H5P8A9dG/nUNFFFFTfa7n'
+    '/n4l/wC+zR9ruf8An4l/77NRMSzFmJJJySe9JRRRRRRRRRRRRRRRRRRRX//Z')
+
+STILL_SIZES = [
+                  {'aspect': '4:3', 'size': '18M'},
+                  {'aspect': '4:3', 'size': '10M'},
+                  {'aspect': '4:3', 'size': '5M'},
+                  {'aspect': '16:9', 'size': '13M'},
+                  {'aspect': '16:9', 'size': '2M'},
+              ]
+
+SHOOT_MODES = ['still', 'movie']
+
+LIVEVIEW_SIZES = ['L', 'M']
+
+# Methods the simulator implements, in the order getAvailableApiList reports them.
+API_METHODS = [
+                  'getMethodTypes', 'getAvailableApiList', 'getApplicationInfo', 'getVersions', 'getEvent',
+                  'startLiveview', 'stopLiveview', 'startLiveviewWithSize', 'getLiveviewSize', 'getAvailableLiveviewSize',
+                  'actTakePicture', 'awaitTakePicture', 'startMovieRec', 'stopMovieRec',
+                  'setShootMode', 'getShootMode', 'getAvailableShootMode', 'getSupportedShootMode',
+                  'setStillSize', 'getStillSize', 'getAvailableStillSize', 'getSupportedStillSize',
+                  'setPostviewImageSize', 'getPostviewImageSize',
+                  'actZoom', 'setTouchAFPosition', 'cancelTouchAFPosition',
+              ]
+
+# Error codes of the Camera Remote API.
+ERROR_ILLEGAL_ARGUMENT   = 3
+ERROR_NO_SUCH_METHOD     = 12
+ERROR_NOT_AVAILABLE_NOW  = 1
+
+
+def paddedJpeg(size):
+    """A valid JPEG of about size bytes, BASE_JPEG with comment segments inserted after its start marker."""
+    padding = []
+    needed = size - len(BASE_JPEG)
+
+    while needed >= 4:
+        # A segment is marker, 2 byte length counting itself, and data.
+        length = min(needed - 2, 0xFFFF)
+        padding.append(b'\xff\xfe' + struct.pack('>H', length) + b'\0' * (length - 2))
+        needed -= length + 2
+
+    return BASE_JPEG[:2] + b''.join(padding) + BASE_JPEG[2:]
+
+
+def liveViewFrame(sequence, timestamp, jpeg, numPaddingBytes=0):
+    """Live view frame with common header, payload header, JPEG data and padding."""
+    commonHeader = struct.pack('>BBHI', 0xFF, 0x01, sequence & 0xFFFF, timestamp & 0xFFFFFFFF)
+    payloadHeader = struct.pack('>4s3sB', b'\x24\x35\x68\x79', struct.pack('>I', len(jpeg))[1:], numPaddingBytes) + b'\0' * 120
+
+    return commonHeader + payloadHeader + jpeg + b'\0' * numPaddingBytes
+
+
+class CameraSimulator(object):
+    """Simulated camera.  start() serves it in background threads, stop() shuts it down."""
+
+    LONG_POLL_LIMIT = 30.0
+
+    def __init__(self, host='127.0.0.1', port=8080, ssdpPort=sonyprotocol.SSDP_PORT, fps=30.0, latency=0.0, jitter=0.0,
+                 loss=0.0, commandLoss=0.0, frameSize=30000, frameSizeVariation=0.0, paddingSize=0,
+                 postviewSize=2 * 1024 * 1024, captureTime=0.3, seed=None, bandwidth=None):
+        """latency is added to every command and live view frame, jitter is the most a frame is delayed on top of
+        that.  loss is the share of live view frames never sent, commandLoss the share of commands that get their
+        connection dropped instead of an answer.  bandwidth limits live view to that many bytes/s, frames captured
+        while the link is still busy are skipped.  Sizes are in bytes, times in seconds."""
+        self.host = host
+        self.port = port
+        self.ssdpPort = ssdpPort
+        self.fps = fps
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.commandLoss = commandLoss
+        self.frameSize = frameSize
+        self.frameSizeVariation = frameSizeVariation
+        self.paddingSize = paddingSize
+        self.postviewSize = postviewSize
+        self.captureTime = captureTime
+        self.seed = seed
+        self.bandwidth = bandwidth
+
+        # Live view streams each get their own generator seeded from this one, so they do not disturb each other.
+        self.random = random.Random(seed)
+        self.randomLock = threading.Lock()
+
+        self.condition = threading.Condition()
+        self.version = 0
+        self.reportedVersion = -1
+        self.cameraStatus = 'IDLE'
+        self.shootMode = 'still'
+        self.stillSize = STILL_SIZES[0]
+        self.postviewImageSize = '2M'
+        self.zoomPosition = 0
+        self.liveviewStatus = False
+        self.liveviewSize = 'M'
+        self.takePictureUrls = []
+        self.pictureNumbers = itertools.count(1)
+
+        self.stopEvent = threading.Event()
+        self.httpServer = None
+        self.ssdpSock = None
+        self.threads = []
+        self.jpegCache = {}
+
+        self.numCommands = 0
+        self.numFramesSent = 0
+        self.numFramesLost = 0
+
+    def baseUrl(self):
+        return 'http://%s:%d' % (self.host, self.port)
+
+    def start(self):
+        handler = type('Handler', (_RequestHandler,), {'simulator': self})
+        self.httpServer = ThreadingHTTPServer((self.host, self.port), handler)
+        self.httpServer.daemon_threads = True
+
+        # Port 0 picks a free port.
+        self.port = self.httpServer.server_address[1]
+
+        self.ssdpSock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self.ssdpSock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.ssdpSock.bind(('', self.ssdpPort))
+        self.ssdpPort = self.ssdpSock.getsockname()[1]
+
+        try:
+            membership = socket.inet_aton(sonyprotocol.SSDP_IP) + socket.inet_aton('0.0.0.0')
+            self.ssdpSock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+
+        except socket.error as msg:
+            print("SSDP multicast not available, answering unicast only: %s" % msg)
+
+        for target, name in ((self.httpServer.serve_forever, 'SimulatorHttp'), (self._ssdpLoop, 'SimulatorSsdp')):
+            thread = threading.Thread(target=target, name=name)
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        self.stopEvent.set()
+
+        with self.condition:
+            self.condition.notify_all()
+
+        if self.httpServer:
+            self.httpServer.shutdown()
+            self.httpServer.server_close()
+
+        if self.ssdpSock:
+            self.ssdpSock.close()
+
+    def _chance(self, probability):
+        with self.randomLock:
+            return self.random.random() < probability
+
+    def _jpeg(self, size):
+        if size not in self.jpegCache:
+            self.jpegCache[size] = paddedJpeg(size)
+
+        return self.jpegCache[size]
+
+    def _ssdpLoop(self):
+        while not self.stopEvent.is_set():
+            try:
+                message, address = self.ssdpSock.recvfrom(2048)
+
+            except socket.error:
+                break
+
+            message = message.decode('utf8', 'replace')
+
+            if not message.startswith('M-SEARCH') or \
+               (sonyprotocol.SERVICE not in message and 'ssdp:all' not in message):
+                continue
+
+            response = "\r\n".join([
+                'HTTP/1.1 200 OK',
+                'CACHE-CONTROL: max-age=1800',
+                'EXT:',
+                'LOCATION: %s/dd.xml' % self.baseUrl(),
+                'SERVER: UPnP/1.0 SonyImagingDevice/1.0',
+                'ST: %s' % sonyprotocol.SERVICE,
+                'USN: uuid:00000000-0000-0010-8000-000000000000::%s' % sonyprotocol.SERVICE,
+                '',
+                ''])
+
+            time.sleep(self.latency)
+
+            try:
+                self.ssdpSock.sendto(response.encode('utf8'), address)
+
+            except socket.error:
+                pass
+
+    def deviceDescription(self):
+        services = ''.join('<av:X_ScalarWebAPI_Service>'
+                           '<av:X_ScalarWebAPI_ServiceType>%s</av:X_ScalarWebAPI_ServiceType>'
+                           '<av:X_ScalarWebAPI_ActionList_URL>%s/sony</av:X_ScalarWebAPI_ActionList_URL>'
+                           '</av:X_ScalarWebAPI_Service>' % (service, self.baseUrl())
+                           for service in ('guide', 'accessControl', 'camera'))
+
+        return ('<?xml version="1.0"?>'
+                '<root xmlns="urn:schemas-upnp-org:device-1-0">'
+                '<specVersion><major>1</major><minor>0</minor></specVersion>'
+                '<device>'
+                '<deviceType>urn:schemas-upnp-org:device:Basic:1</deviceType>'
+                '<friendlyName>DSC-QX10 (simulated)</friendlyName>'
+                '<manufacturer>Sony Corporation</manufacturer>'
+                '<modelName>DSC-QX10</modelName>'
+                '<UDN>uuid:00000000-0000-0010-8000-000000000000</UDN>'
+                '<av:X_ScalarWebAPI_DeviceInfo xmlns:av="urn:schemas-sony-com:av">'
+                '<av:X_ScalarWebAPI_Version>1.0</av:X_ScalarWebAPI_Version>'
+                '<av:X_ScalarWebAPI_ServiceList>%s</av:X_ScalarWebAPI_ServiceList>'
+                '</av:X_ScalarWebAPI_DeviceInfo>'
+                '</device>'
+                '</root>' % services).encode('utf8')
+
+    def availableApiList(self):
+        """Methods available in the current state, like the camera the list changes with mode and status."""
+        unavailable = set()
+
+        if self.shootMode != 'still' or self.cameraStatus != 'IDLE':
+            unavailable.update(['actTakePicture', 'awaitTakePicture', 'setStillSize'])
+
+        if self.shootMode != 'movie' or self.cameraStatus != 'IDLE':
+            unavailable.add('startMovieRec')
+
+        if self.cameraStatus != 'MovieRecording':
+            unavailable.add('stopMovieRec')
+
+        if self.cameraStatus != 'IDLE':
+            unavailable.add('setShootMode')
+
+        return [method for method in API_METHODS if method not in unavailable]
+
+    def _changed(self, **fields):
+        """Update state fields and wake long-polling getEvent calls.  Call with condition held."""
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+        self.version += 1
+        self.condition.notify_all()
+
+    def eventResult(self):
+        """getEvent result in the layout of API version 1.0."""
+        result = [None] * 26
+
+        result[0] = {'type': 'availableApiList', 'names': self.availableApiList()}
+        result[1] = {'type': 'cameraStatus', 'cameraStatus': self.cameraStatus}
+        result[2] = {'type': 'zoomInformation', 'zoomPosition': self.zoomPosition, 'zoomNumberBox': 1,
+                     'zoomIndexCurrentBox': 0, 'zoomPositionCurrentBox': self.zoomPosition}
+        result[3] = {'type': 'liveviewStatus', 'liveviewStatus': self.liveviewStatus}
+        result[5] = [{'type': 'takePicture', 'takePictureUrl': self.takePictureUrls}] if self.takePictureUrls else []
+        result[10] = [{'type': 'storageInformation', 'storageID': 'Memory Card 1', 'recordTarget': True,
+                       'numberOfRecordableImages': 1000, 'recordableTime': -1, 'storageDescription': ''}]
+        result[14] = {'type': 'stillSize', 'aspect': self.stillSize['aspect'], 'size': self.stillSize['size']}
+        result[19] = {'type': 'postviewImageSize', 'currentPostviewImageSize': self.postviewImageSize,
+                      'postviewImageSizeCandidates': ['Original', '2M']}
+        result[20] = {'type': 'selfTimer', 'currentSelfTimer': 0, 'selfTimerCandidates': [0, 2, 10]}
+        result[21] = {'type': 'shootMode', 'currentShootMode': self.shootMode, 'shootModeCandidates': SHOOT_MODES}
+
+        return result
+
+    def handleCommand(self, method, params):
+        """Returns (result, None) or (None, [error code, message])."""
+        self.numCommands += 1
+
+        if method not in API_METHODS:
+            return None, [ERROR_NO_SUCH_METHOD, 'No Such Method']
+
+        with self.condition:
+            if method not in self.availableApiList() and method not in ('getEvent', 'getAvailableApiList'):
+                return None, [ERROR_NOT_AVAILABLE_NOW, 'Not Available Now']
+
+        handler = getattr(self, '_' + method, None)
+
+        if handler is None:
+            return [0], None
+
+        try:
+            return handler(*params), None
+
+        except (TypeError, ValueError, IndexError, KeyError):
+            return None, [ERROR_ILLEGAL_ARGUMENT, 'Illegal Argument']
+
+    def _getMethodTypes(self, version=''):
+        return [[method, [], [], '1.0'] for method in API_METHODS]
+
+    def _getAvailableApiList(self):
+        with self.condition:
+            return [self.availableApiList()]
+
+    def _getApplicationInfo(self):
+        return ['Smart Remote Control', '2.1.4']
+
+    def _getVersions(self):
+        return [['1.0']]
+
+    def _getEvent(self, longPoll):
+        with self.condition:
+            if longPoll:
+                # Hold the call until something changed since the last getEvent.
+                self.condition.wait_for(lambda: self.version != self.reportedVersion or self.stopEvent.is_set(),
+                                        CameraSimulator.LONG_POLL_LIMIT)
+
+            self.reportedVersion = self.version
+            result = self.eventResult()
+
+            # Picture URLs are reported once.
+            self.takePictureUrls = []
+
+            return result
+
+    def _startLiveview(self):
+        with self.condition:
+            self._changed(liveviewStatus=True)
+
+        return ['%s/liveview/liveviewstream' % self.baseUrl()]
+
+    def _startLiveviewWithSize(self, size):
+        if size not in LIVEVIEW_SIZES:
+            raise ValueError(size)
+
+        with self.condition:
+            self._changed(liveviewSize=size)
+
+        return self._startLiveview()
+
+    def _stopLiveview(self):
+        with self.condition:
+            self._changed(liveviewStatus=False)
+
+        return [0]
+
+    def _getLiveviewSize(self):
+        return [self.liveviewSize]
+
+    def _getAvailableLiveviewSize(self):
+        return [self.liveviewSize, LIVEVIEW_SIZES]
+
+    def _actTakePicture(self):
+        with self.condition:
+            self._changed(cameraStatus='StillCapturing')
+
+        time.sleep(self.captureTime)
+
+        url = '%s/postview/pict%06d.jpg' % (self.baseUrl(), next(self.pictureNumbers))
+
+        with self.condition:
+            self._changed(cameraStatus='IDLE', takePictureUrls=[url])
+
+        return [[url]]
+
+    def _startMovieRec(self):
+        with self.condition:
+            self._changed(cameraStatus='MovieRecording')
+
+        return [0]
+
+    def _stopMovieRec(self):
+        with self.condition:
+            self._changed(cameraStatus='IDLE')
+
+        return ['']
+
+    def _setShootMode(self, mode):
+        if mode not in SHOOT_MODES:
+            raise ValueError(mode)
+
+        with self.condition:
+            self._changed(shootMode=mode)
+
+        return [0]
+
+    def _getShootMode(self):
+        return [self.shootMode]
+
+    def _getAvailableShootMode(self):
+        return [self.shootMode, SHOOT_MODES]
+
+    def _getSupportedShootMode(self):
+        return [SHOOT_MODES]
+
+    def _setStillSize(self, aspect, size):
+        stillSize = {'aspect': aspect, 'size': size}
+
+        if stillSize not in STILL_SIZES:
+            raise ValueError(stillSize)
+
+        with self.condition:
+            self._changed(stillSize=stillSize)
+
+        return [0]
+
+    def _getStillSize(self):
+        return [self.stillSize]
+
+    def _getAvailableStillSize(self):
+        return [self.stillSize, STILL_SIZES]
+
+    def _getSupportedStillSize(self):
+        return [STILL_SIZES]
+
+    def _setPostviewImageSize(self, size):
+        with self.condition:
+            self._changed(postviewImageSize=size)
+
+        return [0]
+
+    def _getPostviewImageSize(self):
+        return [self.postviewImageSize]
+
+    def _actZoom(self, direction, movement):
+        if direction not in ('in', 'out') or movement not in ('start', 'stop', '1shot'):
+            raise ValueError(direction)
+
+        if movement == 'stop':
+            return [0]
+
+        step = 10 if movement == 'start' else 5
+
+        with self.condition:
+            position = self.zoomPosition + (step if direction == 'in' else -step)
+            self._changed(zoomPosition=max(0, min(100, position)))
+
+        return [0]
+
+    def liveViewFrames(self, write):
+        """Stream live view frames with write(data) until it fails or the simulator stops."""
+        with self.randomLock:
+            rng = random.Random(self.random.random())
+
+        # frameSize is for the default M size, L frames have four times the pixels.
+        frameSize = self.frameSize * 4 if self.liveviewSize == 'L' else self.frameSize
+        interval = 1.0 / self.fps
+        start = time.monotonic()
+        linkFree = start
+
+        for sequence in itertools.count():
+            if self.stopEvent.is_set() or not self.liveviewStatus:
+                break
+
+            captured = start + sequence * interval
+
+            if self.bandwidth and linkFree > captured + interval:
+                # Link still busy with earlier frames, the camera skips this one.
+                self.numFramesLost += 1
+                continue
+
+            if rng.random() < self.loss:
+                self.numFramesLost += 1
+                continue
+
+            size = int(frameSize * (1.0 + rng.uniform(-self.frameSizeVariation, self.frameSizeVariation)))
+            data = liveViewFrame(sequence, int((captured - start) * 1000), self._jpeg(size), self.paddingSize)
+
+            delay = captured + self.latency + rng.uniform(0, self.jitter) - time.monotonic()
+
+            if delay > 0:
+                time.sleep(delay)
+
+            write(data)
+            self.numFramesSent += 1
+
+            if self.bandwidth:
+                # Hold the stream for the time the frame takes on the link.
+                linkFree = max(linkFree, time.monotonic()) + len(data) / self.bandwidth
+                time.sleep(max(0.0, linkFree - time.monotonic()))
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    simulator = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        simulator = self.simulator
+
+        if self.path == '/dd.xml':
+            self._sendBody(simulator.deviceDescription(), 'text/xml')
+
+        elif self.path.startswith('/postview/'):
+            time.sleep(simulator.latency)
+            self._sendBody(simulator._jpeg(simulator.postviewSize), 'image/jpeg')
+
+        elif self.path == '/liveview/liveviewstream' and simulator.liveviewStatus:
+            self.close_connection = True
+
+            try:
+                self.send_response(200)
+                self.send_header('Content-Type', 'image/jpeg')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+
+                simulator.liveViewFrames(self.wfile.write)
+
+            except (BrokenPipeError, ConnectionResetError, socket.error, ValueError):
+                # Client went away.
+                pass
+
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        simulator = self.simulator
+
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf8'))
+            method, params, requestId = request['method'], request.get('params', []), request.get('id')
+
+        except (ValueError, KeyError):
+            self.send_error(400)
+            return
+
+        if not self.path.startswith('/sony/'):
+            self.send_error(404)
+            return
+
+        time.sleep(simulator.latency)
+
+        if simulator._chance(simulator.commandLoss):
+            # Lost command, the client sees its connection drop.
+            self.close_connection = True
+            return
+
+        result, error = simulator.handleCommand(method, params)
+
+        if error:
+            response = {'error': error, 'id': requestId}
+
+        else:
+            response = {'result': result, 'id': requestId}
+
+        self._sendBody(json.dumps(response).encode('utf8'), 'application/json')
+
+    def _sendBody(self, body, contentType):
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', contentType)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        except (BrokenPipeError, ConnectionResetError):
+            # Client gave up waiting, e.g. on a long-polling getEvent.
+            self.close_connection = True
+
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(description="Simulated Sony DSC-QX10 for testing without the camera.")
+    parser.add_argument('--host', default='127.0.0.1', help="address to serve on (default: %(default)s)")
+    parser.add_argument('--port', type=int, default=8080, help="HTTP port (default: %(default)s)")
+    parser.add_argument('--ssdp-port', type=int, default=sonyprotocol.SSDP_PORT, help="SSDP port (default: %(default)s)")
+    parser.add_argument('--fps', type=float, default=30.0, help="live view frame rate (default: %(default)s)")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to commands and frames (default: %(default)s)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="most seconds a frame is delayed on top of latency (default: %(default)s)")
+    parser.add_argument('--loss', type=float, default=0.0, help="share of live view frames lost (default: %(default)s)")
+    parser.add_argument('--command-loss', type=float, default=0.0, help="share of commands lost (default: %(default)s)")
+    parser.add_argument('--frame-size', type=int, default=30000, help="live view JPEG bytes (default: %(default)s)")
+    parser.add_argument('--frame-size-variation', type=float, default=0.0, help="relative frame size variation (default: %(default)s)")
+    parser.add_argument('--padding', type=int, default=0, help="padding bytes after each frame (default: %(default)s)")
+    parser.add_argument('--postview-size', type=int, default=2 * 1024 * 1024, help="postview JPEG bytes (default: %(default)s)")
+    parser.add_argument('--capture-time', type=float, default=0.3, help="seconds actTakePicture takes (default: %(default)s)")
+    parser.add_argument('--seed', type=int, help="random seed, for reproducible runs")
+    parser.add_argument('--bandwidth', type=float, help="live view link bytes/s (default: unlimited)")
+
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parseArguments(argv)
+
+    simulator = CameraSimulator(args.host, args.port, args.ssdp_port, args.fps, args.latency, args.jitter, args.loss,
+                                args.command_loss, args.frame_size, args.frame_size_variation, args.padding,
+                                args.postview_size, args.capture_time, args.seed, args.bandwidth)
+    simulator.start()
+
+    print("Simulated QX10 at %s, SSDP on port %d" % (simulator.baseUrl(), simulator.ssdpPort))
+
+    try:
+        while True:
+            time.sleep(1)
+
+    except KeyboardInterrupt:
+        pass
+
+    simulator.stop()
+
+    return 0
+
+
+#Run this as a script if running stand alone
+if __name__=="__main__":
+    sys.exit(main(sys.argv[1:]))
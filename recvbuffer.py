@@ -0,0 +1,48 @@
+import socket
+
+
+class RecvBuffer(object):
+    """Reusable, growable receive buffer filled in place with sock.recv_into().
+
+    Views returned by fill() point straight into the buffer and stay valid until the next fill()."""
+
+    INITIAL_SIZE = 64 * 1024
+
+    def __init__(self, size=INITIAL_SIZE):
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+
+    def reserve(self, size):
+        """Make sure the buffer can hold at least size bytes."""
+        if size > len(self.buffer):
+            # Allocate a new buffer rather than resizing in place, views handed out earlier keep the old one alive.
+            self.buffer = bytearray(max(size, 2 * len(self.buffer)))
+            self.view = memoryview(self.buffer)
+
+    def fill(self, sock, numBytes, offset=0, progress=None):
+        """Read exactly numBytes from sock into the buffer at offset.
+
+        Returns a memoryview of the received bytes, or None if the socket failed or closed early.
+        progress, if given, is called with the number of bytes received so far after every read."""
+        self.reserve(offset + numBytes)
+
+        view = self.view
+        position = offset
+        end = offset + numBytes
+
+        while position < end:
+            try:
+                received = sock.recv_into(view[position:end])
+
+            except socket.error:
+                received = 0
+
+            if received == 0:
+                return None
+
+            position += received
+
+            if progress:
+                progress(position - offset)
+
+        return view[offset:end]
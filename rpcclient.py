@@ -0,0 +1,52 @@
+import itertools
+
+from concurrent.futures import ThreadPoolExecutor
+
+import sonyprotocol
+
+
+class RpcClient(object):
+    """JSON-RPC request/response layer for camera commands.
+
+    Every request gets a unique id and the response is checked against it.  callAsync() returns a Future, so
+    independent commands can be in flight together, each on its own kept-alive connection from the pool."""
+
+    MAX_IN_FLIGHT = 4
+
+    def __init__(self, pool, path):
+        self.pool = pool
+        self.path = path
+        self.requestIds = itertools.count(1)
+        self.executor = ThreadPoolExecutor(max_workers=RpcClient.MAX_IN_FLIGHT, thread_name_prefix='RpcClient')
+
+    def call(self, methodStr, paramsList, timeout=None):
+        """Send command and wait for its result.  Returns None on error."""
+        requestId = next(self.requestIds)
+
+        # Camera API getters only read state, they are safe to send twice.
+        jsonResponseString = self.pool.post(self.path, sonyprotocol.cameraCommandBody(methodStr, paramsList, requestId), timeout,
+                                            methodStr.startswith('get'))
+
+        if jsonResponseString is None:
+            print("sock error")
+            return None
+
+        try:
+            return sonyprotocol.parseCommandResponse(methodStr, paramsList, jsonResponseString, requestId)
+
+        except ValueError:
+            print("ERROR: Invalid response to %s" % methodStr)
+            return None
+
+    def callAsync(self, methodStr, paramsList, callback=None):
+        """Send command without waiting.  Returns a Future of the result, callback is called with the result when it arrives."""
+        future = self.executor.submit(self.call, methodStr, paramsList)
+
+        if callback:
+            # A call that raised counts as failed.
+            future.add_done_callback(lambda f: callback(None if f.exception() else f.result()))
+
+        return future
+
+    def close(self):
+        self.executor.shutdown(wait=False)
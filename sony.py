@@ -2,25 +2,30 @@
 
 import sys
 import time
-import uuid
 import os
-import io
-import math
-import operator
 
 from sonycamera import SonyCamera
+from photostorage import PhotoStorage
+from framedecoder import FrameDecoder
+from motiondetector import MotionWorker
+from motiontrigger import MotionTrigger
+from liveviewrecorder import LiveViewRecorder
+from framering import FrameRing
+from mjpegserver import MjpegServer
+from capabilitycache import CapabilityCache
+from discovery import DiscoveryCache
+from liveviewsize import LiveViewSizeController
 
 from PyQt4.QtGui import *
 from PyQt4.QtCore import *
 from PyQt4.QtSvg import *
 
-from PIL import Image
-from functools import reduce
-
 
 class LiveView(QFrame):
     INIT_WIDTH = 600.0
     INIT_HEIGHT = 400.0
+    REFRESH_RATE = 60
+    FOCUS_MARK_SIZE = 40
 
     def __init__(self, parent=None):
         super(LiveView, self).__init__(parent)
@@ -33,86 +38,199 @@ class LiveView(QFrame):
         self.setToolTip("Click image to focus camera at mouse location")
         self.setMinimumSize(LiveView.INIT_WIDTH, LiveView.INIT_HEIGHT)
         self.enabled = True
-        self.previousImage = None
-        self.frameCount = 0
         self.displayGrid = True
+        self.displayStats = False
+
+        # Live view stream health counters, told when frames reach the screen.
+        self.stats = None
+        self.statsText = ''
+
+        # Touch focus position in percent of the image, None until clicked.
+        self.focusPoint = None
+
+        # Grid, focus point and stats are drawn once into a transparent layer, rebuilt only when they change.
+        self.overlay = None
+
+        # Frame picked up but not painted yet, and the time its pixmap conversion took.
+        self.pendingFrame = None
+        self.convertTime = 0.0
+
+        # Frames are decoded and scaled to the widget size in a worker thread, display picks up only the newest one
+        # at screen refresh rate and copies it to the screen as is.
+        self.decoder = FrameDecoder()
+        self.decoder.start()
+
+        self.refreshTimer = QTimer(self)
+        self.connect(self.refreshTimer, SIGNAL("timeout()"), self.showLatestFrame)
+        self.refreshTimer.start(1000 // LiveView.REFRESH_RATE)
 
     def paintEvent(self, event):
         super(LiveView, self).paintEvent(event)
 
+        start = time.perf_counter()
+
         option = QStyleOption()
         option.initFrom(self)
 
-        # Get available screen realestate.
-        h = option.rect.height()
-        w = option.rect.width()
-
         # Create painter.
         painter = QPainter(self);
+
+        if self.pixmap.size() == option.rect.size():
+            painter.drawPixmap(0, 0, self.pixmap)
+
+        else:
+            # Only until the decoder delivers frames of the new size.
+            painter.drawPixmap(option.rect, self.pixmap)
+
+        if self.overlay is None or self.overlay.size() != option.rect.size():
+            self.overlay = self.renderOverlay(option.rect.size())
+
+        painter.drawPixmap(0, 0, self.overlay)
+        painter.end()
+
+        if self.pendingFrame is not None:
+            frame, self.pendingFrame = self.pendingFrame, None
+
+            if self.stats:
+                self.stats.frameDisplayed(frame.timestamp, paintTime=self.convertTime + time.perf_counter() - start)
+
+    def renderOverlay(self, size):
+        """Grid, focus point and stats on a transparent pixmap of size."""
+        overlay = QPixmap(size)
+        overlay.fill(Qt.transparent)
+
+        h = size.height()
+        w = size.width()
+
+        painter = QPainter(overlay)
         painter.setRenderHint(QPainter.Antialiasing, True)
-        painter.drawPixmap(0, 0, w, h, self.pixmap)
 
         if self.displayGrid:
-            line1 = QLine(0, h/3, w, h/3)
-            line2 = QLine(0, 2 * h/3, w, 2 * h/3)
-            line3 = QLine(w/3, 0, w/3, h)
-            line4 = QLine(2 * w/3, 0, 2 * w/3, h)
+            painter.drawLine(QLine(0, h/3, w, h/3))
+            painter.drawLine(QLine(0, 2 * h/3, w, 2 * h/3))
+            painter.drawLine(QLine(w/3, 0, w/3, h))
+            painter.drawLine(QLine(2 * w/3, 0, 2 * w/3, h))
+
+        if self.focusPoint is not None:
+            x, y = self.focusPoint
+            markSize = LiveView.FOCUS_MARK_SIZE
+
+            painter.setPen(QPen(Qt.green, 2))
+            painter.drawRect(QRect(int(x * w / 100.0) - markSize // 2, int(y * h / 100.0) - markSize // 2, markSize, markSize))
 
-            painter.drawLine(line1)
-            painter.drawLine(line2)
-            painter.drawLine(line3)
-            painter.drawLine(line4)
+        if self.displayStats and self.statsText:
+            painter.setPen(Qt.white)
+            painter.drawText(QRect(10, 10, w - 20, h - 20), Qt.AlignLeft | Qt.AlignTop, self.statsText)
+
+        painter.end()
+
+        return overlay
+
+    def invalidateOverlay(self):
+        self.overlay = None
+        self.update()
 
     def enableGrid(self, value):
         self.displayGrid = value
+        self.invalidateOverlay()
 
-    def updatePixmap(self, image):
-        # Update displayed image only when there is a new image available.
-        if id(image) != id(self.image) and image != None:
-            self.image = image
-            self.pixmap.loadFromData(image)
+    def enableStats(self, value):
+        self.displayStats = value
+        self.invalidateOverlay()
 
-            self.frameCount += 1
+    def setStats(self, snapshot):
+        """Show a LiveViewStats snapshot, if stats are enabled."""
+        self.statsText = "%.1f fps  %.0f kB/s  %d dropped" % (snapshot['fps'], snapshot['bytesPerSecond'] / 1000, snapshot['framesDropped'])
 
-            if self.frameCount > 30:
-                self.frameCount = 0
+        if snapshot['latency'] is not None:
+            self.statsText += "\nlatency %.0f ms" % (snapshot['latency'] * 1000)
 
-                self.detectMotion(image)
+        if snapshot['paintTime'] is not None:
+            self.statsText += "\npaint %.1f ms" % (snapshot['paintTime'] * 1000)
 
-            self.update()
+        if self.displayStats:
+            self.invalidateOverlay()
+
+    def setTransformMode(self, mode):
+        """Scaling of frames to the widget, Qt.SmoothTransformation (default) or Qt.FastTransformation."""
+        self.decoder.transformMode = mode
 
-    def detectMotion(self, image):
-        image1 = Image.open(io.BytesIO(image))
-        image1.load()
-        h1 = image1.histogram()
+    def resizeEvent(self, event):
+        super(LiveView, self).resizeEvent(event)
+
+        # Following frames come scaled to the new size, the current one is scaled once here.
+        self.decoder.targetSize = event.size()
+
+        if not self.pixmap.isNull():
+            self.pixmap = self.pixmap.scaled(event.size(), Qt.IgnoreAspectRatio, self.decoder.transformMode)
+
+        self.overlay = None
+
+    def updatePixmap(self, frame):
+        # Update displayed image only when there is a new image available.
+        if frame is not self.image and frame != None:
+            self.image = frame
+            self.decoder.submit(frame)
 
-        if self.previousImage:
-            h2 = self.previousImage.histogram()
-            rms = math.sqrt(reduce(operator.add, list(map(lambda a, b: (a - b) ** 2, h1, h2))) / len(h1))
+    def showLatestFrame(self):
+        # Stale decoded frames have already been dropped by the decoder.
+        decoded = self.decoder.latestImage()
 
-            print((int(rms / 10)))
+        if decoded is not None:
+            decodedImage, frame = decoded
 
-        self.previousImage = image1
+            start = time.perf_counter()
+            self.pixmap = QPixmap.fromImage(decodedImage)
+            self.convertTime = time.perf_counter() - start
+
+            self.pendingFrame = frame
+            self.update()
 
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
             x = (event.x() * 100.0) / self.width()
             y = (event.y() * 100.0) / self.height()
+            self.focusPoint = (x, y)
+            self.invalidateOverlay()
             self.emit(SIGNAL('clicked(int, int)'), x, y)
 
 
 
 class MyMainWindow(QWidget):
+    photoSavedSignal = pyqtSignal(object)
+    storageErrorSignal = pyqtSignal(object)
+    motionScoreSignal = pyqtSignal(object)
+    preTriggerSavedSignal = pyqtSignal(object)
+
+    PRE_TRIGGER_MAX_SECONDS = 60
+
     def __init__(self, parent):
         QWidget.__init__(self)
 
-        # Timer used to update progress bar when foto is downloaded from camera.
-        self.timer = QTimer()
-        self.connect(self.timer, SIGNAL("timeout()"), self.updateProgressBar)
+        # Photos are written to disk by storage worker threads, never by the GUI thread.
+        self.photoStorage = PhotoStorage(self.getPhotoDirectory(),
+                                         savedCallback=self.photoSavedSignal.emit,
+                                         errorCallback=self.storageErrorSignal.emit)
+        self.photoSavedSignal.connect(self.handlePhotoSaved)
+        self.storageErrorSignal.connect(self.handleStorageError)
+
+        # Motion analysis of every live view frame, in its own thread.
+        self.motionWorker = MotionWorker(self.handleMotionAnalysis)
+        self.motionWorker.start()
 
         # Create camera handler and run it in a separate thread.
         self.cameraThread = QThread()
         self.camera = SonyCamera()
+
+        # Photos are streamed from camera straight to disk.
+        self.camera.client.photoStorage = self.photoStorage
+
+        # Reconnect to a known camera without waiting for discovery.
+        self.camera.client.discoveryCache = DiscoveryCache()
+        self.camera.client.capabilityCache = CapabilityCache()
+
+        # Large live view when the link carries it, smaller when it does not.
+        self.camera.client.liveViewSizeController = LiveViewSizeController()
         self.camera.moveToThread(self.cameraThread)
         self.cameraThread.start()
 
@@ -121,10 +239,29 @@ class MyMainWindow(QWidget):
         self.changeGuiState(False)
 
         # Connect things up
-        self.camera.newPreviewImageSignal.connect(self.liveView.updatePixmap)
+        self.camera.newLiveViewFrameSignal.connect(self.liveView.updatePixmap)
+        self.camera.newLiveViewFrameSignal.connect(self.motionWorker.submit)
+        self.motionScoreSignal.connect(self.handleMotionScore)
+        self.camera.shutterSignal.connect(self.handleShutter)
+
+        # Live view rebroadcast for other viewers, started with the share button.
+        self.liveViewServer = None
+
+        # Last live view frames in a fixed amount of memory, saved on demand or with every capture.
+        self.frameRing = FrameRing(maxSeconds=MyMainWindow.PRE_TRIGGER_MAX_SECONDS)
+        self.camera.client.frameRing = self.frameRing
+        self.preTriggerSavedSignal.connect(self.handlePreTriggerSaved)
+
+        # Unattended capture when motion is seen.  takePhoto only posts an event, safe to call from motion worker.
+        self.motionTrigger = MotionTrigger(self.camera.takePhoto)
+        self.liveView.stats = self.camera.client.liveViewStats
+        self.camera.liveViewStatsSignal.connect(self.liveView.setStats)
         self.camera.liveViewRunningSignal.connect(self.connectedToCamera)
         self.camera.newFotoSignal.connect(self.handleNewFoto)
+        self.camera.newFotoFileSignal.connect(self.handleNewFotoFile)
+        self.camera.photoDownloadProgressSignal.connect(self.updateProgressBar)
         self.camera.liveViewStoppedSignal.connect(self.stopLiveView)
+        self.camera.burstFinishedSignal.connect(self.handleBurstFinished)
 
         # Now start camera connection in camera thread which will also kickoff the liveview.
         self.camera.startCamera()
@@ -169,6 +306,17 @@ class MyMainWindow(QWidget):
         self.snapButton.setToolTip("Press to take a photo. Image will automagically be uploaded to computer.")
         self.connect(self.snapButton, SIGNAL("clicked()"), self.takePhoto)
 
+        # --------------------------------Burst button---------------------------------
+        self.burstCountSpin = QSpinBox()
+        self.burstCountSpin.setRange(2, 100)
+        self.burstCountSpin.setValue(5)
+        self.burstCountSpin.setSuffix(" shots")
+        self.burstCountSpin.setToolTip("Number of photos taken by a burst")
+
+        self.burstButton = QPushButton("Burst", self)
+        self.burstButton.setToolTip("Press to take a series of photos as fast as the camera allows.")
+        self.connect(self.burstButton, SIGNAL("clicked()"), self.takeBurst)
+
         # --------------------------------Zoom buttons---------------------------------
         self.zoomOutButton = QPushButton("Zoom Out")
         self.zoomOutButton.setToolTip("Press and hold for continuous zoom out")
@@ -187,6 +335,55 @@ class MyMainWindow(QWidget):
         self.gridButton.setToolTip("Press to display rule of 1/3 grid.")
         self.connect(self.gridButton, SIGNAL("clicked()"), self.enableGrid)
 
+        # --------------------------------Show stats button---------------------------------
+        self.statsButton = QPushButton("Show Stats", self)
+        self.statsButton.setCheckable(True)
+        self.statsButton.setToolTip("Press to display live view frame rate, latency and paint time.")
+        self.connect(self.statsButton, SIGNAL("toggled(bool)"), self.liveView.enableStats)
+
+        # --------------------------------Motion score---------------------------------
+        self.motionLabel = QLabel("Motion: -")
+        self.motionLabel.setToolTip("Amount of motion in live view, 0 to 100")
+
+        # --------------------------------Motion trigger---------------------------------
+        self.motionTriggerCheck = QCheckBox("Motion Trigger")
+        self.motionTriggerCheck.setToolTip("Take a photo automatically when motion reaches the threshold.")
+        self.connect(self.motionTriggerCheck, SIGNAL("toggled(bool)"), self.enableMotionTrigger)
+
+        self.motionThresholdSpin = QSpinBox()
+        self.motionThresholdSpin.setRange(1, 100)
+        self.motionThresholdSpin.setValue(20)
+        self.motionThresholdSpin.setPrefix("Threshold: ")
+        self.motionThresholdSpin.setToolTip("Motion score that triggers a photo")
+        self.connect(self.motionThresholdSpin, SIGNAL("valueChanged(int)"), self.setMotionThreshold)
+
+        # --------------------------------Record live view button---------------------------------
+        self.recordLiveViewButton = QPushButton("Record Live View", self)
+        self.recordLiveViewButton.setCheckable(True)
+        self.recordLiveViewButton.setToolTip("Press to record the live view stream to disk.")
+        self.connect(self.recordLiveViewButton, SIGNAL("toggled(bool)"), self.recordLiveView)
+
+        # --------------------------------Share live view button---------------------------------
+        self.shareLiveViewButton = QPushButton("Share Live View", self)
+        self.shareLiveViewButton.setCheckable(True)
+        self.shareLiveViewButton.setToolTip("Press to serve live view as MJPEG on port %d for other viewers." % MjpegServer.DEFAULT_PORT)
+        self.connect(self.shareLiveViewButton, SIGNAL("toggled(bool)"), self.shareLiveView)
+
+        # --------------------------------Pre-trigger buffer---------------------------------
+        self.preTriggerSpin = QSpinBox()
+        self.preTriggerSpin.setRange(1, MyMainWindow.PRE_TRIGGER_MAX_SECONDS)
+        self.preTriggerSpin.setValue(10)
+        self.preTriggerSpin.setPrefix("Last ")
+        self.preTriggerSpin.setSuffix(" s")
+        self.preTriggerSpin.setToolTip("Seconds of live view saved from before the moment")
+
+        self.savePreTriggerButton = QPushButton("Save Live View", self)
+        self.savePreTriggerButton.setToolTip("Press to save the last seconds of live view to disk.")
+        self.connect(self.savePreTriggerButton, SIGNAL("clicked()"), self.savePreTrigger)
+
+        self.preTriggerCheck = QCheckBox("Save With Photos")
+        self.preTriggerCheck.setToolTip("Save the last seconds of live view with every photo taken.")
+
         # --------------------------------Connect to camera button---------------------------------
         self.connectButton = QPushButton("Connect to Camera", self)
         self.connectButton.setToolTip("Press to connect to camera.")
@@ -205,10 +402,21 @@ class MyMainWindow(QWidget):
         vlayout.addWidget(self.startRecButton)
         vlayout.addWidget(self.stopRecButton)
         vlayout.addWidget(self.snapButton)
+        vlayout.addWidget(self.burstCountSpin)
+        vlayout.addWidget(self.burstButton)
         vlayout.addWidget(self.zoomInButton)
         vlayout.addWidget(self.zoomOutButton)
         vlayout.addWidget(self.gridButton)
+        vlayout.addWidget(self.statsButton)
         vlayout.addWidget(self.stillSizeCombo)
+        vlayout.addWidget(self.motionLabel)
+        vlayout.addWidget(self.motionTriggerCheck)
+        vlayout.addWidget(self.motionThresholdSpin)
+        vlayout.addWidget(self.recordLiveViewButton)
+        vlayout.addWidget(self.shareLiveViewButton)
+        vlayout.addWidget(self.preTriggerSpin)
+        vlayout.addWidget(self.savePreTriggerButton)
+        vlayout.addWidget(self.preTriggerCheck)
         vlayout.addStretch(1)
         vlayout.addWidget(self.connectMessage)
         vlayout.addWidget(self.connectButton)
@@ -223,15 +431,23 @@ class MyMainWindow(QWidget):
         self.startRecButton.setEnabled(False)
         self.stopRecButton.setEnabled(False)
         self.snapButton.setEnabled(state)
+        self.burstButton.setEnabled(state)
+        self.burstCountSpin.setEnabled(state)
         self.zoomOutButton.setEnabled(state)
         self.zoomInButton.setEnabled(state)
         self.liveView.setEnabled(state)
         self.connectMessage.setVisible(not state)
         self.connectButton.setEnabled(not state)
         self.gridButton.setEnabled(state)
+        self.statsButton.setEnabled(state)
         self.stillSizeCombo.setEnabled(state)
+        self.motionTriggerCheck.setEnabled(state)
+        self.motionThresholdSpin.setEnabled(state)
+        self.recordLiveViewButton.setEnabled(state)
 
         if not state:
+            self.motionTriggerCheck.setChecked(False)
+            self.recordLiveViewButton.setChecked(False)
             self.imageUploadProgressBar.hide()
             self.stillSizeCombo.clear()
             self.shootModeCombo.clear()
@@ -260,8 +476,8 @@ class MyMainWindow(QWidget):
     def changeStillSize(self):
         if self.shootModeCombo.currentIndex() == 0: 
             index = self.stillSizeCombo.currentIndex()
-            aspect = self.camera.supportedStillSizes[index]['aspect']
-            size = self.camera.supportedStillSizes[index]['size']
+            aspect = self.camera.client.supportedStillSizes[index]['aspect']
+            size = self.camera.client.supportedStillSizes[index]['size']
             print((aspect,size))
             self.camera.sendCameraCommand('setStillSize', ['%s' % aspect, '%s' % size])
 
@@ -273,12 +489,14 @@ class MyMainWindow(QWidget):
             self.stopRecButton.setEnabled(False)
             self.stillSizeCombo.setEnabled(True)
             self.snapButton.setEnabled(True)
+            self.burstButton.setEnabled(True)
         elif index == 1:
             self.camera.videoMode()
             self.startRecButton.setEnabled(True)
             self.stopRecButton.setEnabled(True)
             self.stillSizeCombo.setEnabled(False)
             self.snapButton.setEnabled(False)
+            self.burstButton.setEnabled(False)
 
     def connectedToCamera(self):
         self.changeGuiState(True)
@@ -291,8 +509,8 @@ class MyMainWindow(QWidget):
         # Clear combobox first.
         self.stillSizeCombo.clear()
 
-        if self.camera.supportedStillSizes:
-            self.comboList = ['Aspect Ratio: %s, Size: %s' % (d['aspect'], d['size']) for d in self.camera.supportedStillSizes]
+        if self.camera.client.supportedStillSizes:
+            self.comboList = ['Aspect Ratio: %s, Size: %s' % (d['aspect'], d['size']) for d in self.camera.client.supportedStillSizes]
             self.stillSizeCombo.addItems(self.comboList)
 
     def stopLiveView(self):
@@ -311,42 +529,156 @@ class MyMainWindow(QWidget):
     def takePhoto(self):
         self.snapButton.setEnabled(False)
         image = self.camera.takePhoto()
-        self.timer.start(100)
+        self.updateProgressBar(0)
+
+    def takeBurst(self):
+        self.snapButton.setEnabled(False)
+        self.burstButton.setEnabled(False)
+        self.camera.takeBurst(self.burstCountSpin.value())
+
+    def handleBurstFinished(self, stats):
+        self.snapButton.setEnabled(True)
+        self.burstButton.setEnabled(True)
+        self.burstButton.setToolTip("Last burst: %d shots at %.2f shots/s" % (stats['shots'], stats['sustainedShotsPerSecond']))
+
+    def handleMotionAnalysis(self, score, frame):
+        # Called in motion worker thread.
+        self.motionScoreSignal.emit(score)
+        self.motionTrigger.update(score, frame.receivedAt)
+
+    def handleMotionScore(self, score):
+        self.motionLabel.setText("Motion: %d" % score)
+
+    def enableMotionTrigger(self, value):
+        self.motionTrigger.enabled = value
+
+    def setMotionThreshold(self, value):
+        # Re-arm once motion has dropped to half the threshold.
+        self.motionTrigger.threshold = value
+        self.motionTrigger.releaseThreshold = value / 2.0
+
+    def handleShutter(self, when, token):
+        if when is not None and self.preTriggerCheck.isChecked():
+            self.savePreTrigger()
+
+        latency = self.motionTrigger.shutterReleased(token, when)
+
+        if latency is not None:
+            stats = self.motionTrigger.stats()
+            print("Motion trigger: %.0f ms trigger to shutter, %.0f ms mean over %d captures" % (latency * 1000, stats['meanLatency'] * 1000, len(self.motionTrigger.latencies)))
+            self.motionTriggerCheck.setToolTip("Last trigger to shutter latency: %.0f ms" % (latency * 1000))
+
+    def savePreTrigger(self):
+        # A name of its own for every dump, even two in the same second.
+        try:
+            path = self.photoStorage.reservePath('.mjpeg', 'pretrigger-')
+
+        except OSError as msg:
+            print("Unable to save live view frames: %s" % msg)
+            return
+
+        # Frames are copied out at once, the file is written in the background.
+        self.frameRing.dump(path, self.preTriggerSpin.value(), lambda path, numFrames: self.preTriggerSavedSignal.emit((path, numFrames)))
+
+    def handlePreTriggerSaved(self, result):
+        path, numFrames = result
+
+        if path:
+            print("Saved %d live view frames to %s" % (numFrames, path))
+            self.savePreTriggerButton.setToolTip("Last saved: %s, %d frames" % (path, numFrames))
+
+    def recordLiveView(self, value):
+        if value:
+            name = time.strftime('liveview-%Y%m%d-%H%M%S.mjpeg')
+            path = os.path.join(self.getPhotoDirectory(), name)
+
+            try:
+                self.camera.client.liveViewRecorder = LiveViewRecorder(path)
+
+            except (IOError, OSError) as msg:
+                print("Unable to record live view: %s" % msg)
+                self.recordLiveViewButton.setChecked(False)
+                return
 
-    def updateProgressBar(self):
+            self.camera.client.liveViewRecorder.start()
+            self.recordLiveViewButton.setText("Stop Live View Rec")
+
+        else:
+            recorder, self.camera.client.liveViewRecorder = self.camera.client.liveViewRecorder, None
+
+            if recorder:
+                recorder.close()
+                print("Recorded %d live view frames to %s, %d dropped" % (recorder.numFrames, recorder.path, recorder.numDropped))
+
+            self.recordLiveViewButton.setText("Record Live View")
+
+    def shareLiveView(self, value):
+        if value:
+            server = MjpegServer()
+
+            try:
+                server.start()
+
+            except OSError as msg:
+                print("Unable to share live view: %s" % msg)
+                self.shareLiveViewButton.setChecked(False)
+                return
+
+            self.liveViewServer = server
+            self.camera.newLiveViewFrameSignal.connect(server.publish)
+            self.shareLiveViewButton.setToolTip("Live view at http://<this computer>:%d/" % server.port)
+
+        elif self.liveViewServer:
+            self.camera.newLiveViewFrameSignal.disconnect(self.liveViewServer.publish)
+            self.liveViewServer.stop()
+            self.liveViewServer = None
+            self.shareLiveViewButton.setToolTip("Press to serve live view as MJPEG on port %d for other viewers." % MjpegServer.DEFAULT_PORT)
+
+    def updateProgressBar(self, percent):
         x = self.liveView.width() / 2.0 - 200
         y = self.liveView.height() / 2.0
         self.imageUploadProgressBar.move(x, y)
-        self.imageUploadProgressBar.setValue(self.camera.photoUploadPercent)
+        self.imageUploadProgressBar.setValue(percent)
         self.imageUploadProgressBar.show()
 
+    def getPhotoDirectory(self):
+        path = os.path.join('.', 'DCIM')
+
+        try:
+            os.makedirs(path)
+
+        except OSError:
+            # Path already exists.
+            if not os.path.isdir(path):
+                # DCIM is the name of a file.
+                print("File with name DCIM already exists.")
+                path = '.'
+
+        return path
+
+    def handleNewFotoFile(self, path):
+        self.imageUploadProgressBar.hide()
+        self.snapButton.setEnabled(True)
+
     def handleNewFoto(self, imageData):
-        self.timer.stop()
         self.imageUploadProgressBar.hide()
         self.snapButton.setEnabled(True)
 
         if imageData:
-            u = uuid.uuid1().fields[0]
-            filename = '{0}.jpg'.format(u)
-            path = os.path.join('.', 'DCIM')
+            # Hand over to storage workers, errors come back through handleStorageError.
+            self.photoStorage.submit(imageData)
 
-            try:
-                os.makedirs(path)
+    def handlePhotoSaved(self, path):
+        print("Saved photo %s" % path)
 
-            except OSError:
-                # Path already exists.
-                if not os.path.isdir(path):
-                    # DCIM is the name of a file.
-                    print("File with name DCIM already exists.")
-                    path = '.'
+    def handleStorageError(self, message):
+        self.snapButton.setToolTip(message)
 
-            newFilePath = os.path.join(path, filename)
+    def closeEvent(self, event):
+        # Photos still queued on the storage workers would be lost with them.
+        self.photoStorage.close()
 
-            try:
-                with open(newFilePath, 'wb') as f:
-                    f.write(imageData)
-            except:
-                print(("Unable to save file %s.jpg" % newFilePath))
+        QWidget.closeEvent(self, event)
 
 
 #---------------------------------------------------Main--------------------------------------------
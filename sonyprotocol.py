@@ -0,0 +1,165 @@
+"""Sony Camera Remote API protocol helpers shared by the blocking and asyncio camera clients."""
+
+import json
+import urllib.parse
+
+
+SERVICE    = "urn:schemas-sony-com:service:ScalarWebAPI:1"
+SSDP_IP    = '239.255.255.250'
+SSDP_PORT  = 1900
+
+
+def ssdpSearchMessage(service, ssdpIp=SSDP_IP, ssdpPort=SSDP_PORT):
+    """Simple service discovery protocol M-SEARCH message for service."""
+    messageTemplate = "\r\n".join([
+        'M-SEARCH * HTTP/1.1',
+        'HOST: {0}:{1}',
+        'MAN: "ssdp:discover"',
+        'MX: 1',
+        'ST: {st}',
+        '',
+        ''])
+
+    return bytes(messageTemplate.format(ssdpIp, ssdpPort, st=service), 'UTF-8')
+
+
+def parseSSDPResponse(message):
+    """Extract the interesting fields of an SSDP response.  Result has a 'location' key only if the response is usable."""
+    SSDPInfo = {}
+
+    for line in message.splitlines():
+        lowerline = line.lower()
+
+        if lowerline.startswith('location: '):
+            SSDPInfo['location'] = line.split(': ', 1)[1]
+
+        elif lowerline.startswith('server: '):
+            SSDPInfo['server'] = line.split(': ', 1)[1]
+
+        elif lowerline.startswith('st: '):
+            SSDPInfo['st'] = line.split(': ', 1)[1]
+
+        elif lowerline.startswith('usn: '):
+            SSDPInfo['usn'] = line.split(': ', 1)[1]
+
+        elif lowerline.startswith('cache-control: '):
+            SSDPInfo['cache-control'] = line.split(': ', 1)[1]
+
+    return SSDPInfo
+
+
+def splitUrl(urlString):
+    """Returns (host, port, path including query) of an http URL, or None if it has no explicit port."""
+    url = urllib.parse.urlparse(urlString)
+    temp = url.netloc.split(':')
+
+    if len(temp) != 2:
+        return None
+
+    path = url.path
+
+    if url.query:
+        path = ''.join([path, '?', url.query])
+
+    return temp[0], int(temp[1]), path
+
+
+def httpGetRequest(path, host):
+    return bytes("GET %s HTTP/1.0\r\nHost: %s\r\n\r\n" % (path, host), 'UTF-8')
+
+
+def getMessageLengthField(headerString):
+    """Content-Length of an HTTP header given as bytes, 0 if there is none."""
+    payloadLength = 0
+
+    for line in headerString.splitlines():
+        lowerline = line.lower()
+
+        if lowerline.startswith(b'content-length: '):
+            payloadLength = int(line.split(b': ', 1)[1])
+
+    return payloadLength
+
+
+def parseCameraXmlDoc(cameraXmlDataString):
+    """Parse camera device description.  Returns dict of service type -> action list URL."""
+    # Only discovery needs lxml, import it here so the rest of the protocol loads without it.
+    from lxml import etree
+
+    cameraXmlDoc = etree.fromstring(cameraXmlDataString)
+    serviceUrls = {}
+
+    # Scan XML document from camera for relevant URLs, e.g. the URL to send Song API commands to.
+    for e in cameraXmlDoc.iter("{urn:schemas-sony-com:av}X_ScalarWebAPI_Service"):
+        temp = list(e.iter("{urn:schemas-sony-com:av}X_ScalarWebAPI_ServiceType", "{urn:schemas-sony-com:av}X_ScalarWebAPI_ActionList_URL"))
+
+        if len(temp) >= 2:
+            serviceUrls[temp[0].text] = temp[1].text
+
+    return serviceUrls
+
+
+def cameraCommandUrl(serviceUrls):
+    """URL camera API commands are sent to, None if the camera service is missing."""
+    if 'camera' in serviceUrls:
+        return '/'.join([serviceUrls['camera'], 'camera'])
+
+    return None
+
+
+def sortStillSizes(sizes):
+    """getSupportedStillSize entries, largest first."""
+    return sorted(sizes, key=lambda d: int(d['size'].rstrip('M')), reverse=True)
+
+
+def cameraCommandBody(methodStr, paramsList, requestId=1):
+    """JSON-RPC camera command as bytes."""
+    jsonData = {
+                   "method": methodStr,
+                   "params": paramsList,
+                   "id": requestId,
+                   "version": "1.0"
+               }
+
+    return bytes(json.dumps(jsonData), 'UTF-8')
+
+
+def cameraCommandRequest(path, host, methodStr, paramsList, requestId=1):
+    """Complete HTTP POST request carrying a JSON-RPC camera command."""
+    body = cameraCommandBody(methodStr, paramsList, requestId)
+    commandString = "POST %s HTTP/1.1\r\nHost: %s\r\nContent-Length: %d\r\n\r\n" % (path, host, len(body))
+
+    return bytes(commandString, 'UTF-8') + body
+
+
+def parseCommandResponse(methodStr, paramsList, jsonResponseString, requestId=None):
+    """Returns the result of a JSON-RPC camera command response, None if camera returned an error.
+
+    If requestId is given, a response carrying a different id is rejected."""
+    jsonCommandResponse = json.loads(jsonResponseString.decode('utf8'))
+
+    if requestId is not None and jsonCommandResponse.get('id', requestId) != requestId:
+        print("sendCommand: Response id %s does not match request id %d" % (jsonCommandResponse['id'], requestId))
+        print(("sendCommand: Method = %s" % methodStr))
+        retVal = None
+
+    elif 'error' in jsonCommandResponse:
+        errorCode = jsonCommandResponse['error'][0]
+        errorMessage = jsonCommandResponse['error'][1]
+        print("sendCommand: Got error response")
+        print(("sendCommand: Method = %s" % methodStr))
+        print(("sendCommand: Params = %s" % paramsList))
+        print(("sendCommand: Error code = %d" % errorCode))
+        print(("sendCommand: Error message = %s" % errorMessage))
+        retVal = None
+
+    elif 'result' in jsonCommandResponse:
+        retVal = jsonCommandResponse['result']
+
+    elif 'results' in jsonCommandResponse:
+        retVal = jsonCommandResponse['results']
+
+    else:
+        retVal = jsonCommandResponse
+
+    return retVal
@@ -0,0 +1,171 @@
+import json
+import threading
+import time
+
+from collections import deque
+
+
+class LiveViewStats(object):
+    """Live view stream health counters.
+
+    Fed by the live view thread for every received frame and by the display for every shown frame.  Frame rate and
+    byte rate are measured over the last WINDOW seconds, dropped frames come from gaps in the camera's frame
+    sequence numbers, and jitter is the smoothed deviation of frame arrival spacing from the camera's own timestamp
+    spacing, computed as for RTP (RFC 3550).
+
+    Camera and host clocks are not synchronised, so latency is measured relative to the fastest frame seen so far:
+    it is how much longer than the best case the current frame took from camera to screen."""
+
+    WINDOW = 2.0
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.startTime = time.monotonic()
+            self.lastExport = self.startTime
+
+            self.framesReceived = 0
+            self.framesDropped = 0
+            self.framesDisplayed = 0
+            self.bytesReceived = 0
+
+            self.window = deque()
+            self.windowBytes = 0
+
+            self.lastSequence = None
+            self.lastTimestamp = None
+            self.lastArrival = None
+            self.jitter = 0.0
+
+            self.clockOffset = None
+            self.latency = None
+            self.paintTime = None
+
+            self.recoveries = 0
+            self.lastRecoveryTime = None
+
+    def streamStarted(self):
+        """Call before frames of a new stream arrive.  Its sequence numbers and timestamps start afresh, so the last
+        ones seen and the clock offset are forgotten; the counters keep going."""
+        with self.lock:
+            self.lastSequence = None
+            self.lastTimestamp = None
+            self.lastArrival = None
+            self.clockOffset = None
+
+    def frameReceived(self, sequence, timestamp, numBytes, arrival=None):
+        """sequence and timestamp (ms) are from the frame's common header, arrival is time.monotonic()."""
+        if arrival is None:
+            arrival = time.monotonic()
+
+        with self.lock:
+            self.framesReceived += 1
+            self.bytesReceived += numBytes
+
+            if self.lastSequence is not None:
+                # 16 bit sequence number, wraps around.
+                gap = (sequence - self.lastSequence - 1) & 0xFFFF
+
+                # A huge gap means the camera restarted its counter rather than lost frames.
+                if gap < 0x8000:
+                    self.framesDropped += gap
+
+            if self.lastTimestamp is not None:
+                transit = (arrival - self.lastArrival) * 1000.0 - ((timestamp - self.lastTimestamp) & 0xFFFFFFFF)
+                self.jitter += (abs(transit) - self.jitter) / 16.0
+
+            # Smallest arrival-minus-timestamp seen is the best case transit, used as clock offset for latency.
+            offset = arrival * 1000.0 - timestamp
+
+            if self.clockOffset is None or offset < self.clockOffset:
+                self.clockOffset = offset
+
+            self.lastSequence = sequence
+            self.lastTimestamp = timestamp
+            self.lastArrival = arrival
+
+            self.window.append((arrival, numBytes))
+            self.windowBytes += numBytes
+            self._trimWindow(arrival)
+
+    def frameDisplayed(self, timestamp, displayTime=None, paintTime=None):
+        """Call when the frame with camera timestamp (ms) reaches the screen.  paintTime is the seconds it took the
+        display to render it, kept as a smoothed average."""
+        if displayTime is None:
+            displayTime = time.monotonic()
+
+        with self.lock:
+            self.framesDisplayed += 1
+
+            if paintTime is not None:
+                if self.paintTime is None:
+                    self.paintTime = paintTime
+
+                else:
+                    self.paintTime += (paintTime - self.paintTime) / 16.0
+
+            if self.clockOffset is not None:
+                self.latency = (displayTime * 1000.0 - timestamp - self.clockOffset) / 1000.0
+
+    def recovered(self, seconds):
+        """Call when live view came back after a dropout, seconds is how long that took."""
+        with self.lock:
+            self.recoveries += 1
+            self.lastRecoveryTime = seconds
+
+    def snapshot(self):
+        """Current counters as a dict."""
+        now = time.monotonic()
+
+        with self.lock:
+            self._trimWindow(now)
+
+            if len(self.window) > 1:
+                span = now - self.window[0][0]
+                fps = (len(self.window) - 1) / span if span else 0.0
+                bytesPerSecond = self.windowBytes / span if span else 0.0
+
+            else:
+                fps = 0.0
+                bytesPerSecond = 0.0
+
+            return {
+                       'time': time.time(),
+                       'uptime': now - self.startTime,
+                       'fps': fps,
+                       'bytesPerSecond': bytesPerSecond,
+                       'framesReceived': self.framesReceived,
+                       'framesDropped': self.framesDropped,
+                       'framesDisplayed': self.framesDisplayed,
+                       'bytesReceived': self.bytesReceived,
+                       'jitter': self.jitter / 1000.0,
+                       'latency': self.latency,
+                       'paintTime': self.paintTime,
+                       'recoveries': self.recoveries,
+                       'lastRecoveryTime': self.lastRecoveryTime,
+                   }
+
+    def exportDue(self, interval):
+        """True once every interval seconds, for periodic export from the frame loop."""
+        now = time.monotonic()
+
+        with self.lock:
+            if now - self.lastExport < interval:
+                return False
+
+            self.lastExport = now
+
+            return True
+
+    def export(self, f):
+        """Append a snapshot to file f as one JSON line."""
+        f.write(json.dumps(self.snapshot()) + '\n')
+        f.flush()
+
+    def _trimWindow(self, now):
+        while self.window and now - self.window[0][0] > LiveViewStats.WINDOW:
+            arrival, numBytes = self.window.popleft()
+            self.windowBytes -= numBytes